@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
+from django.db.models import Count
 
 from .models import (
     InternalEntity, InternalDepartment,
@@ -50,11 +51,34 @@ class CustomUserAdmin(UserAdmin):
 # =========================
 # Document
 # =========================
+class DuplicateUploadFilter(admin.SimpleListFilter):
+    """Documents whose file content was uploaded more than once"""
+    title = 'duplicate uploads'
+    parameter_name = 'duplicates'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Duplicates only'),)
+
+    def queryset(self, request, queryset):
+        if self.value() != 'yes':
+            return queryset
+        duplicated = Document.objects.exclude(content_hash='').values('content_hash').annotate(
+            copies=Count('id')
+        ).filter(copies__gt=1).values('content_hash')
+        return queryset.filter(content_hash__in=duplicated)
+
+
 class DocumentAdmin(admin.ModelAdmin):
     list_display = ('title', 'document_number', 'entity_type', 'document_type', 'uploaded_by', 'last_modified_by', 'uploaded_at')
-    list_filter = ('entity_type', 'document_type', 'uploaded_at')
-    search_fields = ('title', 'document_number', 'notes')
-    readonly_fields = ('uploaded_at','uploaded_by','last_modified_by')
+    list_filter = (DuplicateUploadFilter, 'entity_type', 'document_type', 'processing_status', 'language', 'file_extension', 'uploaded_at')
+    search_fields = ('title', 'document_number', 'notes', 'content_hash')
+    readonly_fields = ('uploaded_at','uploaded_by','last_modified_by', 'content_hash')
+
+    def get_ordering(self, request):
+        # Keep each duplicate group together
+        if request.GET.get(DuplicateUploadFilter.parameter_name) == 'yes':
+            return ('content_hash', 'uploaded_at')
+        return super().get_ordering(request)
 
     def save_model(self, request, obj, form, change):
         if not change or not obj.uploaded_by:
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archievesystem', '0009_document_extracted_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='file_extension',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='language',
+            field=models.CharField(blank=True, choices=[('ar', 'Arabic'), ('en', 'English')], db_index=True, default='', editable=False, max_length=2),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='search_filename',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='search_terms',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='search_title',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
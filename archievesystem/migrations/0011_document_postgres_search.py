@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:20
+
+from django.db import migrations
+
+# Arabic-aware normalization mirroring advanced_normalize_text for the
+# columns that are not normalized in Python (notes).
+CREATE_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    r"""
+    CREATE OR REPLACE FUNCTION archive_normalize(value text) RETURNS text AS $$
+        SELECT lower(translate(
+            regexp_replace(coalesce(value, ''), '[\u064B-\u0652\u0670\u0640]', '', 'g'),
+            'أإآٱةىئؤیے',
+            'ااااهييويي'
+        ))
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """,
+    """
+    ALTER TABLE archievesystem_document ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(search_title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(search_filename, '')), 'A') ||
+        setweight(to_tsvector('simple', archive_normalize(notes)), 'B') ||
+        setweight(to_tsvector('simple', coalesce(search_text, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX archievesystem_document_search_vector_gin ON archievesystem_document USING GIN (search_vector)",
+    "CREATE INDEX archievesystem_document_search_title_trgm ON archievesystem_document USING GIN (search_title gin_trgm_ops)",
+    "CREATE INDEX archievesystem_document_number_trgm ON archievesystem_document USING GIN (document_number gin_trgm_ops)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS archievesystem_document_number_trgm",
+    "DROP INDEX IF EXISTS archievesystem_document_search_title_trgm",
+    "DROP INDEX IF EXISTS archievesystem_document_search_vector_gin",
+    "ALTER TABLE archievesystem_document DROP COLUMN IF EXISTS search_vector",
+    "DROP FUNCTION IF EXISTS archive_normalize(text)",
+]
+
+
+def _run_on_postgres(statements):
+    def run(apps, schema_editor):
+        # SQLite keeps using the Python search backend
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archievesystem', '0010_document_search_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_postgres(CREATE_SQL), _run_on_postgres(DROP_SQL)),
+    ]
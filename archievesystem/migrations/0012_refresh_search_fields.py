@@ -0,0 +1,163 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:05
+
+import os
+import re
+from urllib.parse import unquote
+
+from django.db import migrations
+from django.db.models import Q
+
+# Normalization now folds "ئ" to "ي" (it produced a stray "ý") and the
+# Persian "ک" to "ك"; rows containing either need new search columns.
+CHANGED_LETTERS = {
+    'ئ': '%D8%A6',
+    'ک': '%DA%A9',
+}
+
+NORMALIZE_SQL = r"""
+    CREATE OR REPLACE FUNCTION archive_normalize(value text) RETURNS text AS $$
+        SELECT lower(translate(
+            regexp_replace(coalesce(value, ''), '[\u064B-\u0652\u0670\u0640]', '', 'g'),
+            'أإآٱةىئؤیےک',
+            'ااااهييوييك'
+        ))
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+"""
+
+
+# Frozen copy of the search columns at NORMALIZATION_VERSION 2, so later
+# changes to ocr_app cannot change what this migration writes.
+REMOVED = re.compile(r'[\u064B-\u0652\u0670\u0640\u06D6-\u06ED\u08F0-\u08FF\u200C-\u200F]')
+LETTERS = (
+    ('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'),
+    ('ة', 'ه'),
+    ('ى', 'ي'), ('ئ', 'ي'), ('ؤ', 'و'),
+    ('ک', 'ك'), ('ی', 'ي'), ('ے', 'ي'),
+)
+SEPARATORS = re.compile(r'[^\w\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]+')
+VARIANTS = {
+    'ا': ['أ', 'إ', 'آ'],
+    'ي': ['ى', 'ئ'],
+    'ه': ['ة'],
+    'ة': ['ه'],
+    'و': ['ؤ'],
+    'ت': ['ة'],
+}
+
+
+def normalize(text):
+    if not text:
+        return ''
+    for _ in range(3):
+        if '%' not in text:
+            break
+        try:
+            decoded = unquote(text)
+        except Exception:
+            break
+        if decoded == text:
+            break
+        text = decoded
+    text = REMOVED.sub('', text)
+    for variant, letter in LETTERS:
+        text = text.replace(variant, letter)
+    return SEPARATORS.sub(' ', text.lower()).strip()
+
+
+def arabic_variants(word):
+    if not word or len(word) < 2:
+        return [word]
+    variants = [word]
+    for original, replacements in VARIANTS.items():
+        if original in word:
+            variants.extend(word.replace(original, replacement) for replacement in replacements)
+    if '_' in word or '-' in word:
+        variants += [word.replace('_', '-'), word.replace('-', '_'), word.replace('_', ' '), word.replace('-', ' ')]
+    seen = set()
+    return [v for v in variants if v not in seen and not seen.add(v)][:10]
+
+
+def search_terms(text, max_terms):
+    normalized = normalize(text)
+    terms = []
+    for term in re.findall(r'[\w\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]{2,}', normalized):
+        if re.search(r'[\u0600-\u06FF]', term):
+            terms.append(term)
+            terms.extend(arabic_variants(term)[1:5])
+    terms.extend(re.findall(r'[a-z]{2,}', normalized))
+    terms.extend(re.findall(r'\d+', normalized))
+    seen = set()
+    return [t.strip() for t in terms if t and t not in seen and not seen.add(t)][:max_terms]
+
+
+def original_filename(stored_name):
+    filename = os.path.basename(stored_name)
+    if '_' in filename:
+        prefix, rest = filename.split('_', 1)
+        if prefix.isdigit():
+            filename = rest
+    if '.' in filename:
+        filename = filename.rsplit('.', 1)[0]
+    return unquote(filename)
+
+
+def compute_search_fields(file_name, title, extracted_text):
+    stored_filename = os.path.basename(file_name).lower() if file_name else ''
+    search_filename = normalize(original_filename(file_name) if file_name else '')
+    search_title = normalize(title)
+    search_text = normalize(extracted_text)
+
+    language = ''
+    sample = f"{search_filename} {search_title} {search_text[:3000]}"
+    if re.search(r'[\u0600-\u06FF]', sample):
+        language = 'ar'
+    elif sample.strip():
+        language = 'en'
+
+    return {
+        'search_title': search_title[:255],
+        'search_filename': search_filename[:255],
+        'search_text': search_text,
+        'search_terms': {
+            'filename': search_terms(search_filename, 25),
+            'text': search_terms(search_text[:3000], 40),
+        },
+        'language': language,
+        'file_extension': stored_filename.rsplit('.', 1)[1][:10] if '.' in stored_filename else '',
+    }
+
+
+def refresh_search_fields(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(NORMALIZE_SQL)
+
+    Document = apps.get_model('archievesystem', 'Document')
+    affected = Q()
+    for letter, encoded in CHANGED_LETTERS.items():
+        affected |= (
+            Q(title__contains=letter) | Q(file__contains=letter) | Q(file__icontains=encoded) |
+            Q(extracted_text__contains=letter) | Q(notes__contains=letter)
+        )
+
+    fields = ['search_title', 'search_filename', 'search_text', 'search_terms', 'language', 'file_extension']
+    batch = []
+    for doc in Document.objects.filter(affected).only('id', 'file', 'title', 'extracted_text').iterator(chunk_size=500):
+        for name, value in compute_search_fields(doc.file.name if doc.file else None, doc.title, doc.extracted_text).items():
+            setattr(doc, name, value)
+        batch.append(doc)
+        if len(batch) >= 500:
+            Document.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Document.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archievesystem', '0011_document_postgres_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_search_fields, migrations.RunPython.noop),
+    ]
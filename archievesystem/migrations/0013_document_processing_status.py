@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archievesystem', '0012_refresh_search_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='processing_status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='ready', editable=False, max_length=20),
+        ),
+    ]
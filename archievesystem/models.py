@@ -93,9 +93,55 @@ class Document(models.Model):
     )
     modified_at = models.DateTimeField(auto_now=True)
 
+    # Text extraction runs after the upload returns (see ocr_app.ocr_jobs)
+    PROCESSING = 'processing'
+    READY = 'ready'
+    FAILED = 'failed'
+    PROCESSING_STATUS_CHOICES = [
+        (PROCESSING, 'Processing'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+    processing_status = models.CharField(
+        max_length=20, choices=PROCESSING_STATUS_CHOICES, default=READY, db_index=True, editable=False
+    )
+    # SHA-256 of the uploaded file; identical uploads share it
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False)
+
+    # Derived search columns, filled on save (see update_search_fields)
+    ARABIC = 'ar'
+    ENGLISH = 'en'
+    LANGUAGE_CHOICES = [
+        (ARABIC, 'Arabic'),
+        (ENGLISH, 'English'),
+    ]
+    SEARCH_FIELDS = (
+        'search_title', 'search_filename', 'search_text',
+        'search_terms', 'language', 'file_extension',
+    )
+
+    search_title = models.CharField(max_length=255, blank=True, default='', editable=False)
+    search_filename = models.CharField(max_length=255, blank=True, default='', editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+    search_terms = models.JSONField(blank=True, default=dict, editable=False)
+    language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES, blank=True, default='', db_index=True, editable=False)
+    file_extension = models.CharField(max_length=10, blank=True, default='', db_index=True, editable=False)
+
     def __str__(self):
         return f"{self.document_number} - {self.title}"
 
+    def update_search_fields(self):
+        """Recompute the normalized search columns from the current content"""
+        from ocr_app.utils_search import compute_search_fields
+
+        fields = compute_search_fields(
+            self.file.name if self.file else None,
+            self.title,
+            self.extracted_text
+        )
+        for name, value in fields.items():
+            setattr(self, name, value)
+
     def clean(self):
         if self.entity_type == self.INTERNAL:
             if not self.internal_entity or not self.internal_department:
@@ -114,6 +160,7 @@ class Document(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        self.update_search_fields()
         super().save(*args, **kwargs)
         
         
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import InternalEntity, InternalDepartment, ExternalEntity, ExternalDepartment, Document
 
+# Normalized copies kept only for search; too large to send to clients
+HIDDEN_SEARCH_FIELDS = ('search_title', 'search_filename', 'search_text', 'search_terms')
 
 
 
@@ -43,7 +45,7 @@ class GetDocumentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Document
-        fields = '__all__'
+        exclude = HIDDEN_SEARCH_FIELDS
 
 
 
@@ -54,7 +56,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     file = serializers.FileField(required=False)  # ← كده الملف مش مطلوب دايمًا
     class Meta:
         model = Document
-        fields = '__all__'
+        exclude = HIDDEN_SEARCH_FIELDS
         
 
     def validate(self, data):
@@ -1,3 +1,93 @@
-from django.test import TestCase
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ocr_app.models import OcrJob, OcrResult
+from ocr_app.tests import SearchTestCase, docx_bytes
+from ocr_app.utils_ocr import ocr_version
+
+from .models import Document, InternalDepartment
+
+
+class DocumentSearchFieldTests(SearchTestCase):
+    def test_save_fills_the_search_columns(self):
+        document = self.create_document('F-1', title='تقريرُ المالية', text='Quarterly report', file_name='budget.pdf')
+        self.assertEqual(document.search_title, 'تقرير الماليه')
+        self.assertEqual(document.file_extension, 'pdf')
+        self.assertEqual(document.language, Document.ARABIC)
+
+
+class SearchFieldMigrationTests(SearchTestCase):
+    def test_refresh_rewrites_rows_with_changed_letters(self):
+        document = self.create_document('M-1', title='مسائل مالية', text='رسائل الكتاب')
+        fresh = Document.objects.values('search_title', 'search_text', 'search_terms').get(pk=document.pk)
+        Document.objects.filter(pk=document.pk).update(search_title='stale', search_text='', search_terms={})
+
+        migration = import_module('archievesystem.migrations.0012_refresh_search_fields')
+        migration.refresh_search_fields(apps, connection.schema_editor())
+        self.assertEqual(Document.objects.values('search_title', 'search_text', 'search_terms').get(pk=document.pk), fresh)
+
+
+class DocumentApiTests(SearchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_superuser = self.user.is_staff = True
+        self.user.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, number, content, file_name='memo.docx'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/documents/', {
+                'title': 'memo',
+                'document_number': number,
+                'entity_type': Document.INTERNAL,
+                'internal_entity': self.entity.pk,
+                'internal_department': self.department.pk,
+                'document_type': 'وارد',
+                'file': SimpleUploadedFile(file_name, content),
+            }, format='multipart')
+
+    def result_ids(self, response):
+        return [document['id'] for document in response.data['results']]
+
+    @override_settings(OCR_ASYNC=True)
+    def test_upload_queues_text_extraction(self):
+        response = self.upload('A-1', docx_bytes('quokka annual memo'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processing_status'], Document.PROCESSING)
+
+        status = self.client.get(f"/documents/{response.data['id']}/processing_status/").data
+        self.assertEqual(status['job']['status'], OcrJob.QUEUED)
+
+    @override_settings(OCR_ASYNC=True)
+    def test_reupload_reuses_cached_text(self):
+        content = docx_bytes('quokka annual memo')
+        self.upload('A-2', content)
+        content_hash = Document.objects.get(document_number='A-2').content_hash
+        OcrResult.objects.create(content_hash=content_hash, ocr_version=ocr_version(), text='quokka annual memo')
+
+        response = self.upload('A-3', content)
+        self.assertEqual(response.data['processing_status'], Document.READY)
+        self.assertFalse(OcrJob.objects.filter(document_id=response.data['id']).exists())
+
+        duplicates = self.client.get('/documents/duplicates/').data
+        self.assertEqual([group['count'] for group in duplicates], [2])
+
+    def test_search_is_ranked_and_filtered(self):
+        other = InternalDepartment.objects.create(name='Payroll', internal_entity=self.entity)
+        weak = self.create_document('A-4', title='minutes', text='the okapi census')
+        strong = self.create_document('A-5', title='okapi census', text='okapi census okapi')
+        elsewhere = self.create_document('A-6', title='okapi census', text='okapi census', internal_department=other)
+
+        response = self.client.get('/documents/', {'search': 'okapi'})
+        self.assertEqual(self.result_ids(response)[-1], weak.pk)
+        self.assertLess(self.result_ids(response).index(strong.pk), self.result_ids(response).index(weak.pk))
+
+        response = self.client.get('/documents/', {'search': 'okapi', 'internal_department': self.department.pk})
+        self.assertNotIn(elsewhere.pk, self.result_ids(response))
+        self.assertEqual(set(self.result_ids(response)), {weak.pk, strong.pk})
@@ -4,7 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
 from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Count
 
 
 
@@ -14,11 +14,15 @@ from rest_framework import serializers
 import os
 from django.conf import settings
 from ocr_app.views import UploadDocumentService
-from ocr_app.utils_search import search_documents
+from ocr_app.search_backends import get_search_backend
+from ocr_app.document_attributes import parse_filters
+from ocr_app.ocr_jobs import enqueue_document, job_status
+from ocr_app.ocr_cache import cached_text
 from ocr_app.views import UploadDocumentService, SearchDocumentView
 
 from rest_framework.parsers import MultiPartParser
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser
 from rest_framework.filters import SearchFilter
 from rest_framework.exceptions import ValidationError
 
@@ -99,13 +103,15 @@ class DocumentViewSet(viewsets.ModelViewSet):
     
     parser_classes = [MultiPartParser]
     permission_classes = [IsDocumentAccessible]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    # "search" is handled by get_queryset; SearchFilter would re-filter the
+    # ranked results by title/number and drop the index matches
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = [
         'entity_type', 'document_type',
         'external_entity', 'internal_entity',
-        'internal_department', 'external_department','title', 'document_number'
+        'internal_department', 'external_department','title', 'document_number',
+        'language', 'file_extension'
     ]
-    search_fields = ['title', 'document_number']
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -123,18 +129,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not query:
             return queryset
 
-        # ⬅️ استخدم الذكاء الاصطناعي + البحث التقليدي سوا
-        ids = []
-        for doc in (search_documents(query) or []):
-            doc_id = doc.get('id')
-            if doc_id:
-                ids.append(doc_id)  # سيبها كده لو UUID
-
-        return queryset.filter(
-            Q(id__in=ids) |  # ← نتائج الذكاء الاصطناعي
-            Q(title__icontains=query) |
-            Q(document_number__icontains=query)  # ← بحث تقليدي
-        )
+        # Postgres full-text/trigram when configured, otherwise the in-process index
+        filters = parse_filters(self.request.query_params)
+        return get_search_backend().filter_queryset(queryset, query, filters)
 
 
     
@@ -155,6 +152,25 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
         # ✅ استخدم الملف كما هو - بدون save يدوي
         upload_service = UploadDocumentService(file=uploaded_file, user=self.request.user)
+
+        content_hash = upload_service.content_hash()
+
+        if getattr(settings, 'OCR_ASYNC', True):
+            # Re-uploads reuse cached text; otherwise OCR runs in run_ocr_worker
+            # and the client polls processing_status
+            extracted_text = cached_text(content_hash)
+            document = serializer.save(
+                uploaded_by=self.request.user,
+                last_modified_by=self.request.user,
+                file=upload_service.store(),
+                content_hash=content_hash,
+                extracted_text=extracted_text,
+                processing_status=Document.PROCESSING if extracted_text is None else Document.READY
+            )
+            if extracted_text is None:
+                enqueue_document(document)
+            return
+
         file_obj, extracted_text = upload_service.upload()
 
         # هنا Cloudinary هيتعامل مع الملف
@@ -162,6 +178,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
             uploaded_by=self.request.user,
             last_modified_by=self.request.user,
             file=file_obj,
+            content_hash=content_hash,
             extracted_text=extracted_text
         )
 
@@ -186,6 +203,27 @@ class DocumentViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("المستخدم العادي لا يمكنه حذف الملفات.")
         instance.delete()
 
+    @action(detail=True, methods=['get'])
+    def processing_status(self, request, pk=None):
+        return Response(job_status(self.get_object()))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def duplicates(self, request):
+        """Documents uploaded more than once, grouped by file content"""
+        hashes = Document.objects.exclude(content_hash='').values('content_hash').annotate(
+            copies=Count('id')
+        ).filter(copies__gt=1).order_by('-copies', 'content_hash')
+        groups = {row['content_hash']: [] for row in hashes}
+        documents = Document.objects.filter(content_hash__in=groups).order_by('uploaded_at', 'id').values(
+            'id', 'document_number', 'title', 'file', 'uploaded_at', 'uploaded_by__username', 'content_hash'
+        )
+        for document in documents:
+            groups[document.pop('content_hash')].append(document)
+        return Response([
+            {'content_hash': content_hash, 'count': len(members), 'documents': members}
+            for content_hash, members in groups.items()
+        ])
+
     @action(detail=False, methods=['get'])
     def get_initial_data(self, request):
         internal_entities = InternalEntity.objects.all()
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
-# Register your models here.
+
+from .models import OcrJob
+from .ocr_jobs import enqueue_document
+
+
+@admin.register(OcrJob)
+class OcrJobAdmin(admin.ModelAdmin):
+    list_display = ('document', 'status', 'stage', 'progress', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('document__title', 'document__document_number')
+    readonly_fields = [field.name for field in OcrJob._meta.fields]
+    actions = ['retry']
+
+    @admin.action(description="Retry selected jobs")
+    def retry(self, request, queryset):
+        for job in queryset.exclude(status__in=[OcrJob.QUEUED, OcrJob.RUNNING]).select_related('document'):
+            enqueue_document(job.document)
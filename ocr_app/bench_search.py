@@ -0,0 +1,80 @@
+"""pytest-benchmark timings of the search engine on a synthetic corpus.
+
+Not collected by ``manage.py test``; needs pytest-benchmark and pytest-django::
+
+    pytest ocr_app/bench_search.py --ds=project.settings --benchmark-autosave
+    pytest ocr_app/bench_search.py --ds=project.settings --benchmark-compare
+
+``BENCHMARK_SIZE`` sets the corpus size (default 1000). The
+``benchmark_search`` command runs the same workloads without pytest.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('pytest_django')
+
+from archievesystem.models import Document  # noqa: E402
+
+from ocr_app import benchmarks, utils_search  # noqa: E402
+
+SIZE = int(os.environ.get('BENCHMARK_SIZE', benchmarks.SIZES[0]))
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(scope='module')
+def corpus_texts(django_db_setup, django_db_blocker):
+    """A corpus and its index, built once, with snapshots kept in a temporary directory"""
+    index_dir = tempfile.mkdtemp()
+    old_paths = utils_search.INDEX_DIR, utils_search.INDEX_TUNING_FILE
+    utils_search.INDEX_DIR = index_dir
+    utils_search.INDEX_TUNING_FILE = os.path.join(index_dir, 'tuning.json')
+    try:
+        with django_db_blocker.unblock():
+            benchmarks.create_corpus(SIZE)
+            utils_search.index_documents()
+            yield [d.extracted_text for d in Document.objects.only('extracted_text')[:50]]
+            Document.objects.all().delete()
+    finally:
+        utils_search.INDEX_DIR, utils_search.INDEX_TUNING_FILE = old_paths
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def test_advanced_normalize_text(benchmark, corpus_texts):
+    benchmark(lambda: [utils_search.advanced_normalize_text(t) for t in corpus_texts])
+
+
+def test_normalize_many(benchmark, corpus_texts):
+    benchmark(utils_search.normalize_many, corpus_texts)
+
+
+def test_enhanced_extract_search_terms(benchmark, corpus_texts):
+    benchmark(lambda: [utils_search.enhanced_extract_search_terms(t) for t in corpus_texts])
+
+
+def test_index_documents(benchmark, corpus_texts):
+    # Stored embeddings are reused, as in the warm command benchmark
+    benchmark.pedantic(utils_search.index_documents, rounds=3)
+
+
+@pytest.mark.parametrize('query', benchmarks.QUERIES)
+def test_search_documents(benchmark, corpus_texts, query):
+    benchmark(utils_search.search_documents, query)
+
+
+@pytest.mark.parametrize('query', benchmarks.QUERIES)
+def test_suggest_documents(benchmark, corpus_texts, query):
+    def setup():
+        utils_search.clear_embedding_cache()
+        return (query,), {}
+
+    benchmark.pedantic(utils_search.suggest_documents, setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize('query', benchmarks.QUERIES)
+def test_get_word_suggestions(benchmark, corpus_texts, query):
+    benchmark(utils_search.get_word_suggestions, query)
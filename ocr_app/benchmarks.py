@@ -0,0 +1,179 @@
+"""Synthetic corpora and timings for the search engine benchmarks.
+
+Used by the ``benchmark_search`` management command, which runs them
+against a throwaway test database.
+"""
+import random
+import statistics
+import time
+
+from archievesystem.models import CustomUser, Document, InternalDepartment, InternalEntity
+
+from . import utils_search
+
+ARABIC_WORDS = [
+    'تقرير', 'الميزانية', 'مذكرة', 'وزارة', 'المالية', 'عقد', 'صيانة', 'الموارد',
+    'البشرية', 'خطاب', 'رسمي', 'إدارة', 'أمر', 'شراء', 'محضر', 'اجتماع', 'لجنة',
+    'مشتريات', 'توريد', 'أجهزة', 'الحاسب', 'الآلي', 'قرار', 'تعيين', 'موظف',
+    'إجازة', 'سنوية', 'مستشفى', 'مدرسة', 'مؤسسة', 'الشؤون', 'القانونية', 'فاتورة',
+]
+ENGLISH_WORDS = [
+    'report', 'budget', 'contract', 'maintenance', 'invoice', 'meeting', 'minutes',
+    'purchase', 'order', 'committee', 'annual', 'leave', 'employee', 'supply',
+    'hardware', 'policy', 'memo', 'finance', 'approval', 'tender',
+]
+DIACRITICS = ['\u064e', '\u064f', '\u0650', '\u0651', '\u0652', '\u064b']  # fatha, damma, kasra, shadda, sukun, tanween
+EXTENSIONS = ['pdf', 'pdf', 'pdf', 'docx', 'jpg', 'png']
+
+QUERIES = [
+    'تقرير الميزانية',
+    'عقد صيانة',
+    'مُذَكِّرَة رسمية',
+    'امر شراء اجهزة',
+    'محضر اجتماع اللجنة',
+    'annual budget report',
+    'maintenance contract',
+    'invoice فاتورة',
+    'D17',
+    'تقرر',
+]
+
+SIZES = (1000, 10000, 100000)
+
+
+def _diacritize(word, rng):
+    """Scatter harakat over a word the way scanned forms often carry them"""
+    return ''.join(ch + rng.choice(DIACRITICS) if rng.random() < 0.3 else ch for ch in word)
+
+
+def _ocr_noise(word, rng):
+    """Drop or swap characters like a noisy OCR pass"""
+    if len(word) > 3 and rng.random() < 0.5:
+        i = rng.randrange(len(word))
+        return word[:i] + word[i + 1:]
+    return word[::-1] if rng.random() < 0.1 else word
+
+
+def synthetic_text(rng, words=300):
+    """Mixed-script OCR-like text with diacritics, digits and noise"""
+    tokens = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.65:
+            word = rng.choice(ARABIC_WORDS)
+            if rng.random() < 0.15:
+                word = _diacritize(word, rng)
+        elif roll < 0.9:
+            word = rng.choice(ENGLISH_WORDS)
+        else:
+            word = str(rng.randint(1, 2025))
+        if rng.random() < 0.05:
+            word = _ocr_noise(word, rng)
+        tokens.append(word)
+    return ' '.join(tokens)
+
+
+def synthetic_documents(size, seed=0, start=0):
+    """Unsaved Documents with Arabic filenames and precomputed search columns"""
+    rng = random.Random(seed + start)
+    user, _ = CustomUser.objects.get_or_create(email='benchmark@example.com', defaults={'username': 'benchmark'})
+    entity, _ = InternalEntity.objects.get_or_create(name='جهة')
+    department, _ = InternalDepartment.objects.get_or_create(name='ادارة', internal_entity=entity)
+
+    for i in range(start, start + size):
+        name_words = rng.sample(ARABIC_WORDS, 3) + ([rng.choice(ENGLISH_WORDS)] if rng.random() < 0.3 else [])
+        if rng.random() < 0.2:
+            name_words[0] = _diacritize(name_words[0], rng)
+        name = '_'.join(name_words)
+        document = Document(
+            title=' '.join(name_words)[:100],
+            document_number=f'D{i}',
+            notes=synthetic_text(rng, 12) if rng.random() < 0.3 else None,
+            entity_type=Document.INTERNAL,
+            internal_entity=entity,
+            internal_department=department,
+            document_type=rng.choice(['وارد', 'صادر']),
+            file=f'{1700000000 + i}_{name}.{rng.choice(EXTENSIONS)}',
+            extracted_text=synthetic_text(rng, rng.randint(80, 600)),
+            uploaded_by=user,
+        )
+        # bulk_create skips save(), which fills these
+        document.update_search_fields()
+        yield document
+
+
+def create_corpus(size, seed=0, batch_size=2000):
+    """Grow the synthetic corpus to ``size`` documents"""
+    start = Document.objects.count()
+    batch = []
+    for document in synthetic_documents(max(0, size - start), seed, start):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            Document.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Document.objects.bulk_create(batch)
+
+
+def time_call(func, repeat=5, setup=None):
+    """Wall-clock timings of ``func()`` in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def _each_query(func):
+    return lambda: [func(query) for query in QUERIES]
+
+
+def run_benchmarks(size, repeat=5, only=None):
+    """Time the search entry points against the current corpus.
+
+    Query benchmarks run every sample query once per repetition, so their
+    timings cover ``len(QUERIES)`` calls.
+    """
+    texts = [d.extracted_text for d in Document.objects.only('extracted_text')[:50]]
+    benchmarks = [
+        ('advanced_normalize_text', lambda: [utils_search.advanced_normalize_text(t) for t in texts], None),
+        ('normalize_many', lambda: utils_search.normalize_many(texts), None),
+        ('enhanced_extract_search_terms', lambda: [utils_search.enhanced_extract_search_terms(t) for t in texts], None),
+        # First build encodes everything; later builds reuse stored embeddings
+        ('index_documents_cold', utils_search.index_documents, None),
+        ('index_documents_warm', utils_search.index_documents, None),
+        ('search_documents', _each_query(utils_search.search_documents), None),
+        ('suggest_documents', _each_query(utils_search.suggest_documents), utils_search.clear_embedding_cache),
+        ('get_word_suggestions', _each_query(utils_search.get_word_suggestions), None),
+    ]
+
+    results = []
+    for name, func, setup in benchmarks:
+        if only and name not in only:
+            continue
+        runs = 1 if name == 'index_documents_cold' else repeat
+        result = {'name': name, 'size': size}
+        result.update(time_call(func, runs, setup))
+        results.append(result)
+    return results
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    """Benchmarks whose median grew more than ``tolerance`` over the baseline"""
+    previous = {(r['name'], r['size']): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['size']))
+        if before and before['median_ms'] and result['median_ms'] > before['median_ms'] * (1 + tolerance):
+            regressions.append((result, before))
+    return regressions
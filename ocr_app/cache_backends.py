@@ -0,0 +1,83 @@
+import pickle
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Byte accounting shared by every thread's instance of a named cache
+_sizes = {}
+_totals = {}
+
+
+class SizeBoundedLocMemCache(LocMemCache):
+    """Local-memory cache with LRU eviction bounded by entry count and bytes.
+
+    ``OPTIONS['MAX_BYTES']`` caps the total size of the pickled values;
+    least recently used entries are evicted first, as for MAX_ENTRIES.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_bytes = int(params.get('OPTIONS', {}).get('MAX_BYTES', 32 * 1024 * 1024))
+        self._sizes = _sizes.setdefault(name, {})
+        self._total = _totals.setdefault(name, [0])
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._forget(key)
+        if len(value) > self._max_bytes:
+            # Never let one entry flush the whole cache
+            self._delete(key)
+            return
+
+        super()._set(key, value, timeout)
+        self._sizes[key] = len(value)
+        self._total[0] += len(value)
+        while self._total[0] > self._max_bytes and len(self._cache) > 1:
+            self._evict_lru()
+
+    def incr(self, key, delta=1, version=None):
+        # LocMemCache rewrites the value in place, bypassing _set; decr calls this too
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if self._has_expired(key):
+                self._delete(key)
+                raise ValueError(f"Key '{key}' not found")
+            new_value = pickle.loads(self._cache[key]) + delta
+            pickled = pickle.dumps(new_value, self.pickle_protocol)
+            self._cache[key] = pickled
+            self._cache.move_to_end(key, last=False)
+            self._total[0] += len(pickled) - self._sizes.get(key, 0)
+            self._sizes[key] = len(pickled)
+        return new_value
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._sizes.clear()
+            self._total[0] = 0
+        else:
+            for _ in range(len(self._cache) // self._cull_frequency):
+                self._evict_lru()
+
+    def _evict_lru(self):
+        # LocMemCache keeps the most recently used key first
+        key, _ = self._cache.popitem()
+        self._expire_info.pop(key, None)
+        self._forget(key)
+
+    def _forget(self, key):
+        self._total[0] -= self._sizes.pop(key, 0)
+
+    def _delete(self, key):
+        self._forget(key)
+        return super()._delete(key)
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self._sizes.clear()
+            self._total[0] = 0
+
+    @property
+    def total_bytes(self):
+        return self._total[0]
@@ -0,0 +1,161 @@
+import pickle
+
+import numpy as np
+
+# Bump when the pickled layout changes
+DOCUMENT_ATTRIBUTES_VERSION = 2
+
+# Document fields searches can be filtered on (the DocumentViewSet filters)
+FILTER_FIELDS = (
+    'entity_type', 'document_type',
+    'internal_entity', 'internal_department',
+    'external_entity', 'external_department',
+    'language', 'file_extension',
+)
+# Foreign keys are stored as ids, the other fields as codes of their values
+KEY_FIELDS = ('internal_entity', 'internal_department', 'external_entity', 'external_department')
+
+
+def parse_filters(params):
+    """Filter values from request parameters, e.g. ``request.query_params``"""
+    filters = {}
+    for field in FILTER_FIELDS:
+        value = params.get(field)
+        if value in (None, ''):
+            continue
+        if field in KEY_FIELDS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                continue
+        filters[field] = value
+    return filters
+
+
+class DocumentAttributes:
+    """Filterable metadata of the indexed documents as one int32 column per field.
+
+    Rows line up with ``ids``; a removed document keeps its row with id -1
+    until the next full build. ``passages`` counts each document's vectors
+    so a filter can be turned into the passage ids FAISS searches over, and
+    ``versions`` records which version (``modified_at``) of each document
+    the index holds.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.passages = np.empty(0, dtype=np.int32)
+        self.versions = np.empty(0, dtype=np.int64)
+        self.columns = {field: np.empty(0, dtype=np.int32) for field in FILTER_FIELDS}
+        # field -> {value: code}; code 0 means no value
+        self.codes = {field: {} for field in FILTER_FIELDS if field not in KEY_FIELDS}
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.rows
+
+    def _code(self, field, value, add=True):
+        if value in (None, ''):
+            return 0
+        if field in KEY_FIELDS:
+            return int(value)
+        codes = self.codes[field]
+        if add and value not in codes:
+            codes[value] = len(codes) + 1
+        return codes.get(value, -1)
+
+    @classmethod
+    def build(cls, documents):
+        """From ``(doc_id, passage_count, version, fields)`` tuples"""
+        attributes = cls()
+        documents = list(documents)
+        attributes.ids = np.array([doc_id for doc_id, _, _, _ in documents], dtype=np.int64)
+        attributes.passages = np.array([count for _, count, _, _ in documents], dtype=np.int32)
+        attributes.versions = np.array([version for _, _, version, _ in documents], dtype=np.int64)
+        for field in FILTER_FIELDS:
+            attributes.columns[field] = np.array(
+                [attributes._code(field, fields.get(field)) for _, _, _, fields in documents],
+                dtype=np.int32
+            )
+        attributes.rows = {doc_id: row for row, doc_id in enumerate(attributes.ids.tolist())}
+        return attributes
+
+    def copy(self):
+        clone = type(self)()
+        clone.ids = self.ids.copy()
+        clone.passages = self.passages.copy()
+        clone.versions = self.versions.copy()
+        clone.columns = {field: column.copy() for field, column in self.columns.items()}
+        clone.codes = {field: dict(codes) for field, codes in self.codes.items()}
+        clone.rows = dict(self.rows)
+        return clone
+
+    def version(self, doc_id):
+        """Version of a document the index holds, or None if it is not indexed"""
+        row = self.rows.get(doc_id)
+        return None if row is None else int(self.versions[row])
+
+    def set(self, doc_id, fields, passages=None, version=None):
+        """Add or update a document; ``passages=None`` keeps its passage count"""
+        row = self.rows.get(doc_id)
+        if row is None:
+            row = self.rows[doc_id] = len(self.ids)
+            self.ids = np.append(self.ids, np.int64(doc_id))
+            self.passages = np.append(self.passages, np.int32(0))
+            self.versions = np.append(self.versions, np.int64(0))
+            for field in FILTER_FIELDS:
+                self.columns[field] = np.append(self.columns[field], np.int32(0))
+        if passages is not None:
+            self.passages[row] = passages
+        if version is not None:
+            self.versions[row] = version
+        for field in FILTER_FIELDS:
+            self.columns[field][row] = self._code(field, fields.get(field))
+
+    def remove(self, doc_id):
+        row = self.rows.pop(doc_id, None)
+        if row is not None:
+            self.ids[row] = -1
+            self.passages[row] = 0
+            self.versions[row] = 0
+
+    def match(self, filters):
+        """Row mask of the documents matching every ``{field: value}`` filter"""
+        mask = self.ids >= 0
+        for field, value in filters.items():
+            mask &= self.columns[field] == self._code(field, value, add=False)
+        return mask
+
+    def passage_ids(self, mask, passage_bits):
+        """Vector ids of every passage of the rows in ``mask``"""
+        doc_ids = self.ids[mask]
+        counts = self.passages[mask].astype(np.int64)
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(doc_ids << passage_bits, counts) + (np.arange(total, dtype=np.int64) - starts)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(
+                (DOCUMENT_ATTRIBUTES_VERSION, self.ids, self.passages, self.versions, self.columns, self.codes),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            version, ids, passages, *data = pickle.load(f)
+        if version != DOCUMENT_ATTRIBUTES_VERSION:
+            raise ValueError(f"Unsupported document attributes version {version}")
+        attributes = cls()
+        attributes.ids = ids
+        attributes.passages = passages
+        attributes.versions, attributes.columns, attributes.codes = data
+        attributes.rows = {doc_id: row for row, doc_id in enumerate(ids.tolist()) if doc_id >= 0}
+        return attributes
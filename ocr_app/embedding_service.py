@@ -0,0 +1,247 @@
+"""Shared sentence encoder and vector search served over a Unix domain socket.
+
+Web workers normally each load the encoder; with ``SEARCH_EMBEDDING_SOCKET``
+set they send encode and semantic search requests to one
+``run_embedding_service`` process instead, which micro-batches concurrent
+encodes. When the service is not reachable workers fall back to encoding
+and searching in-process.
+
+Only the model is shared. Each worker still loads and updates its own copy
+of the search index, which lexical search, the in-process fallback and the
+change log catch-up need, so index memory still grows with the number of
+workers. Memory-mapped IVF vectors are the exception, read through the
+shared page cache.
+
+Messages are two big-endian uint32 lengths, a JSON header and an optional
+binary payload (float32 vectors, row-major).
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_FRAME = struct.Struct('>II')
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# Encodes arriving within this window are sent to the model together
+BATCH_WINDOW = 0.005  # seconds
+MAX_BATCH = 64  # texts
+
+SOCKET_TIMEOUT = 60  # seconds; indexing sends whole passage batches
+RETRY_INTERVAL = 5  # seconds before trying an unreachable service again
+
+
+class EmbeddingServiceUnavailable(Exception):
+    """The service is not running, not reachable or serves another model"""
+
+
+def send_message(sock, header, payload=b''):
+    header = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_FRAME.pack(len(header), len(payload)) + header + payload)
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock):
+    """Return ``(header, payload)``, or ``(None, b'')`` when the peer closed cleanly"""
+    frame = sock.recv(_FRAME.size, socket.MSG_WAITALL)
+    if not frame:
+        return None, b''
+    if len(frame) < _FRAME.size:
+        frame += _recv_exactly(sock, _FRAME.size - len(frame))
+    header_size, payload_size = _FRAME.unpack(frame)
+    if header_size + payload_size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {header_size + payload_size} bytes is too large")
+    header = json.loads(_recv_exactly(sock, header_size).decode('utf-8'))
+    return header, _recv_exactly(sock, payload_size) if payload_size else b''
+
+
+def _vectors_payload(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    return {'shape': list(vectors.shape)}, vectors.tobytes()
+
+
+def _payload_vectors(header, payload):
+    return np.frombuffer(payload, dtype='float32').reshape(header['shape'])
+
+
+class EncodeBatcher:
+    """Collects texts from concurrent callers and encodes them in one model call"""
+
+    def __init__(self, encode, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.encode_batch = encode
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.thread = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self.thread.start()
+
+    def encode(self, texts):
+        """Embeddings of ``texts``, encoded together with whatever else is waiting"""
+        if not texts:
+            return np.zeros((0, 0), dtype='float32')
+        future = Future()
+        self.requests.put((list(texts), future))
+        return future.result()
+
+    def _take_batch(self):
+        batch = [self.requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = self.encode_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            start = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[start:start + len(item_texts)])
+                start += len(item_texts)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes"""
+
+    def handle(self):
+        service = self.server
+        while True:
+            try:
+                header, _ = recv_message(self.request)
+            except (OSError, ValueError) as e:
+                print(f"Embedding service request error: {e}")
+                return
+            if header is None:
+                return
+
+            try:
+                if header.get('model') != service.model_name:
+                    send_message(self.request, {'error': f"service runs {service.model_name}"})
+                elif header.get('op') == 'encode':
+                    send_message(self.request, *_vectors_payload(service.batcher.encode(header['texts'])))
+                elif header.get('op') == 'search':
+                    results = service.search(header['query'], header.get('top_n', 4), header.get('filters'))
+                    send_message(self.request, {'results': [list(result) for result in results]})
+                elif header.get('op') == 'stats':
+                    send_message(self.request, {'batches': service.batcher.batches, 'texts': service.batcher.texts})
+                else:
+                    send_message(self.request, {'error': f"unknown op {header.get('op')!r}"})
+            except OSError:
+                return
+            except Exception as e:
+                print(f"Embedding service error: {e}")
+                send_message(self.request, {'error': str(e)})
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One encoder for every web worker on the host, answering their encodes and vector searches"""
+
+    daemon_threads = True
+
+    def __init__(self, path, model_name, batcher, search):
+        self.model_name = model_name
+        self.batcher = batcher
+        self.search = search
+        if os.path.exists(path):
+            os.unlink(path)
+        # Owner and group only
+        old_umask = os.umask(0o117)
+        try:
+            super().__init__(path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+
+class EmbeddingClient:
+    """Connection to the embedding service, one socket per thread"""
+
+    def __init__(self, path, model_name):
+        self.path = path
+        self.model_name = model_name
+        self.local = threading.local()
+        self.down_until = 0.0
+
+    def _mark_down(self, reason):
+        """Stop trying the service for a while; reported once per outage"""
+        if time.monotonic() >= self.down_until + RETRY_INTERVAL:
+            print(f"Embedding service unavailable, working in-process: {reason}")
+        self.down_until = time.monotonic() + RETRY_INTERVAL
+        return EmbeddingServiceUnavailable(reason)
+
+    def _connection(self):
+        sock = getattr(self.local, 'sock', None)
+        if sock is None:
+            if time.monotonic() < self.down_until:
+                raise EmbeddingServiceUnavailable(self.path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(SOCKET_TIMEOUT)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                sock.close()
+                raise self._mark_down(f"{self.path}: {e}") from e
+            self.local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self.local, 'sock', None)
+        self.local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def request(self, header):
+        """Send one request and return ``(header, payload)`` of the reply"""
+        sock = self._connection()
+        try:
+            send_message(sock, dict(header, model=self.model_name))
+            reply, payload = recv_message(sock)
+        except (OSError, ValueError) as e:
+            self._close()
+            raise self._mark_down(f"{self.path}: {e}") from e
+        if reply is None or 'error' in reply:
+            self._close()
+            raise self._mark_down(reply['error'] if reply else "connection closed")
+        return reply, payload
+
+    def encode(self, texts):
+        return _payload_vectors(*self.request({'op': 'encode', 'texts': list(texts)}))
+
+    def search(self, query, top_n, filters=None):
+        reply, _ = self.request({'op': 'search', 'query': query, 'top_n': top_n, 'filters': filters})
+        return [tuple(result) for result in reply['results']]
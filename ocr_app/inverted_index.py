@@ -0,0 +1,98 @@
+import pickle
+from collections import Counter
+
+# Bump when the pickled layout changes
+INVERTED_INDEX_VERSION = 1
+
+FIELDS = ('filename', 'title', 'notes', 'document_number', 'text')
+
+
+class InvertedIndex:
+    """Postings from canonical terms to ``{doc_id: term frequency}`` per field.
+
+    The index stores terms only; tokenizing and scoring live in
+    ``utils_search`` so indexing and querying share one analyzer.
+    """
+
+    def __init__(self):
+        self.postings = {field: {} for field in FIELDS}
+        # doc_id -> (original filename, extension, normalized filename)
+        self.documents = {}
+        # After copy() posting lists are shared and copied on first write
+        self._shared = False
+        self._owned = {field: set() for field in FIELDS}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.documents
+
+    def copy(self):
+        """Independent copy that shares posting lists until either side changes one"""
+        clone = type(self)()
+        clone.postings = {field: dict(field_postings) for field, field_postings in self.postings.items()}
+        clone.documents = dict(self.documents)
+        clone._shared = self._shared = True
+        self._owned = {field: set() for field in FIELDS}
+        return clone
+
+    def _writable(self, field, term):
+        """Posting list of ``term`` that only this index refers to, created if missing"""
+        field_postings = self.postings[field]
+        if self._shared and term not in self._owned[field]:
+            self._owned[field].add(term)
+            if term in field_postings:
+                field_postings[term] = dict(field_postings[term])
+        return field_postings.setdefault(term, {})
+
+    def add_document(self, doc_id, field_terms, info):
+        """Index ``field_terms`` ({field: [terms]}) for a document"""
+        self.documents[doc_id] = info
+        for field, terms in field_terms.items():
+            for term, tf in Counter(terms).items():
+                self._writable(field, term)[doc_id] = tf
+
+    def remove_document(self, doc_id, field_terms=None):
+        """Drop a document; without its terms every posting list is scanned"""
+        if self.documents.pop(doc_id, None) is None and field_terms is None:
+            return
+
+        for field, field_postings in self.postings.items():
+            terms = field_postings.keys() if field_terms is None else set(field_terms.get(field, ()))
+            emptied = []
+            for term in terms:
+                docs = field_postings.get(term)
+                if docs and doc_id in docs:
+                    docs = self._writable(field, term)
+                    del docs[doc_id]
+                    if not docs:
+                        emptied.append(term)
+            for term in emptied:
+                del field_postings[term]
+
+    def get(self, field, term):
+        """Posting list of ``term`` in ``field`` (empty dict when absent)"""
+        return self.postings[field].get(term, {})
+
+    def vocabulary(self, field):
+        return self.postings[field].keys()
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(
+                (INVERTED_INDEX_VERSION, self.postings, self.documents),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            version, postings, documents = pickle.load(f)
+        if version != INVERTED_INDEX_VERSION:
+            raise ValueError(f"Unsupported inverted index version {version}")
+        lexical = cls()
+        lexical.postings = postings
+        lexical.documents = documents
+        return lexical
@@ -0,0 +1,49 @@
+import importlib
+import threading
+import time
+
+# Seconds spent loading each heavy dependency, in load order
+_load_timings = {}
+_load_lock = threading.Lock()
+
+
+def record_load(name, seconds):
+    _load_timings[name] = seconds
+
+
+def load_timings():
+    """Return how long each lazily loaded dependency took to load"""
+    return dict(_load_timings)
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _load_lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    record_load(f"import {self._name}", time.perf_counter() - start)
+                    self._module = module
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
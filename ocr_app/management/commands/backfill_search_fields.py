@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from archievesystem.models import Document
+from ocr_app.utils_search import compute_search_fields
+
+
+class Command(BaseCommand):
+    help = "Fill the precomputed search columns of existing documents in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Recompute every document, not only those never filled",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Document.objects.only('id', 'file', 'title', 'extracted_text').order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(search_terms={})
+
+        # Walk by primary key so updated rows never shift the window
+        updated = 0
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            for doc in batch:
+                fields = compute_search_fields(
+                    doc.file.name if doc.file else None,
+                    doc.title,
+                    doc.extracted_text
+                )
+                for name, value in fields.items():
+                    setattr(doc, name, value)
+
+            # bulk_update skips save() and its signals, so the search index is untouched
+            Document.objects.bulk_update(batch, Document.SEARCH_FIELDS)
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"Updated {updated} documents...")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled search fields for {updated} documents."))
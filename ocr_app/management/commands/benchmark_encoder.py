@@ -0,0 +1,126 @@
+import gc
+import os
+import resource
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from archievesystem.models import Document
+from ocr_app import utils_search
+
+SAMPLE_QUERIES = [
+    "تقرير مالي",
+    "خطاب رسمي",
+    "عقد توريد",
+    "مذكرة داخلية",
+    "invoice",
+    "annual report",
+    "meeting minutes",
+    "purchase order",
+]
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak instead of current where /proc is unavailable (KiB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def encode(model, texts):
+    return model.encode(
+        texts,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        normalize_embeddings=True
+    ).astype('float32')
+
+
+class Command(BaseCommand):
+    help = "Compare encoder backends against the fp32 model: cosine parity, query latency and memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends',
+            nargs='+',
+            default=['torch', 'int8', 'onnx'],
+            choices=utils_search.ENCODER_BACKENDS,
+            help="Backends to measure",
+        )
+        parser.add_argument(
+            '--documents',
+            type=int,
+            default=100,
+            help="Document passages used for the parity check",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help="Timed passes over the sample queries",
+        )
+        parser.add_argument(
+            '--min-cosine',
+            type=float,
+            default=0.99,
+            help="Fail when the mean cosine agreement with fp32 is below this",
+        )
+
+    def handle(self, *args, **options):
+        texts = list(SAMPLE_QUERIES)
+        for fields in Document.objects.values('id', *utils_search.INDEXED_FIELDS)[:options['documents']]:
+            passages, _ = utils_search.document_index_content(fields)
+            texts.extend(passages[:1])
+        queries = [utils_search.advanced_normalize_text(q) for q in SAMPLE_QUERIES]
+
+        # Reference vectors from the full-precision model
+        reference_model = utils_search.load_encoder('torch')
+        reference = encode(reference_model, texts)
+        del reference_model
+        gc.collect()
+
+        self.stdout.write(
+            f"{'backend':<8} {'load ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'rss MiB':>9} {'cos mean':>9} {'cos min':>8}"
+        )
+        failed = []
+        for backend in options['backends']:
+            rss_before = current_rss()
+            start = time.perf_counter()
+            try:
+                model = utils_search.load_encoder(backend)
+            except Exception as e:
+                self.stderr.write(f"{backend:<8} unavailable: {e}")
+                continue
+            load_ms = (time.perf_counter() - start) * 1000
+
+            # Warm up, then time one query per call as search does
+            encode(model, queries[:1])
+            latencies = []
+            for _ in range(options['repeat']):
+                for query in queries:
+                    start = time.perf_counter()
+                    encode(model, [query])
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            # Rows are unit vectors, so the dot product is the cosine
+            agreement = np.sum(encode(model, texts) * reference, axis=1)
+            rss_mib = (current_rss() - rss_before) / (1024 * 1024)
+
+            self.stdout.write(
+                f"{backend:<8} {load_ms:>9.1f} {np.percentile(latencies, 50):>8.2f} "
+                f"{np.percentile(latencies, 95):>8.2f} {rss_mib:>9.1f} "
+                f"{agreement.mean():>9.4f} {agreement.min():>8.4f}"
+            )
+            if agreement.mean() < options['min_cosine']:
+                failed.append(backend)
+
+            del model
+            gc.collect()
+
+        if failed:
+            raise CommandError(f"Cosine agreement below {options['min_cosine']}: {', '.join(failed)}")
@@ -0,0 +1,103 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ocr_app import utils_ocr
+from ocr_app.benchmarks import ENGLISH_WORDS
+
+
+def synthetic_pages(count, dpi, seed=0):
+    """A4 pages of typed text rendered like a scan, as grayscale images"""
+    rng = random.Random(seed)
+    pdf = utils_ocr.fitz.open()
+    for _ in range(count):
+        page = pdf.new_page(width=595, height=842)
+        lines = [' '.join(rng.choices(ENGLISH_WORDS, k=8)) for _ in range(30)]
+        page.insert_textbox(page.rect + (56, 56, -56, -56), '\n'.join(lines), fontsize=11)
+    return [utils_ocr._render_page(page, dpi / 72) for page in pdf]
+
+
+def load_pages(path, dpi):
+    """Every page of a PDF, or one image file, in grayscale"""
+    if path.lower().endswith('.pdf'):
+        with utils_ocr.fitz.open(path) as pdf:
+            return [utils_ocr._render_page(page, dpi / 72) for page in pdf]
+    img = utils_ocr.cv2.imdecode(np.fromfile(path, np.uint8), utils_ocr.cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise CommandError(f"Cannot read {path}")
+    return [img]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare OCR engines (load time, per-page latency) and report the adaptive "
+        "multi-pass pipeline's passes and peak image memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--engines',
+            nargs='+',
+            default=list(utils_ocr.OCR_ENGINES),
+            choices=utils_ocr.OCR_ENGINES,
+            help="Engines to measure",
+        )
+        parser.add_argument('--files', nargs='+', default=[], help="Scanned PDFs or images to use instead of synthetic pages")
+        parser.add_argument('--pages', type=int, default=10, help="Synthetic pages when no files are given")
+        parser.add_argument('--dpi', type=int, default=utils_ocr.PDF_OCR_DPI, help="Rendering resolution")
+        parser.add_argument('--repeat', type=int, default=2, help="Timed passes over the pages")
+
+    def handle(self, *args, **options):
+        if options['files']:
+            sources = [page for path in options['files'] for page in load_pages(path, options['dpi'])]
+        else:
+            sources = synthetic_pages(options['pages'], options['dpi'])
+        # Both engines get the same binarized pages; preprocessing is timed once
+        start = time.perf_counter()
+        pages = [utils_ocr._preprocess(page, utils_ocr.MemoryMeter()) for page in sources]
+        preprocess_ms = (time.perf_counter() - start) * 1000 / len(pages)
+        self.stdout.write(f"{len(pages)} pages, preprocessing {preprocess_ms:.1f} ms/page")
+
+        self.stdout.write(f"{'engine':<12} {'load ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'chars':>8}")
+        for name in options['engines']:
+            start = time.perf_counter()
+            try:
+                engine = utils_ocr.load_ocr_engine(name)
+                # Warm up
+                engine.recognize(pages[0])
+            except Exception as e:
+                self.stderr.write(f"{name:<12} unavailable: {e}")
+                continue
+            load_ms = (time.perf_counter() - start) * 1000
+
+            latencies = []
+            chars = 0
+            for _ in range(options['repeat']):
+                for page in pages:
+                    start = time.perf_counter()
+                    chars += len(engine.recognize(page))
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            self.stdout.write(
+                f"{name:<12} {load_ms:>9.1f} {np.percentile(latencies, 50):>9.1f} "
+                f"{np.percentile(latencies, 95):>9.1f} {chars // options['repeat']:>8}"
+            )
+
+        # The pipeline uploads go through, with the configured engine
+        latencies, passes, peaks = [], [], []
+        for source in sources:
+            report = {}
+            start = time.perf_counter()
+            utils_ocr._ocr_passes(
+                lambda scale: utils_ocr._scaled(source, scale), source.size, utils_ocr.MemoryMeter(), report
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            passes.append(len(report['passes']))
+            peaks.append(report['peak_bytes'])
+        self.stdout.write(
+            f"adaptive ({utils_ocr.get_ocr_engine().name}): p50 {np.percentile(latencies, 50):.1f} ms/page, "
+            f"{np.mean(passes):.2f} passes/page, peak {max(peaks) / (1024 * 1024):.1f} MiB "
+            f"(limit {utils_ocr.OCR_MEMORY_LIMIT / (1024 * 1024):.0f} MiB)"
+        )
@@ -0,0 +1,100 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from ocr_app import benchmarks, utils_search
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark normalization, term extraction, indexing and search on synthetic "
+        "Arabic/English corpora in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[1000],
+            help=f"Corpus sizes to benchmark, smallest first (typical: {' '.join(map(str, benchmarks.SIZES))})",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per benchmark")
+        parser.add_argument('--only', nargs='+', help="Run only these benchmarks")
+        parser.add_argument('--seed', type=int, default=0, help="Corpus generator seed")
+        parser.add_argument('--output', help="Write results as JSON to this file")
+        parser.add_argument('--compare', help="Baseline JSON from an earlier run to check for regressions")
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help="Allowed median slowdown against the baseline (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+
+        # Keep the live database, snapshots and index tuning out of it
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        old_paths = utils_search.INDEX_DIR, utils_search.INDEX_TUNING_FILE
+        results = []
+        try:
+            with tempfile.TemporaryDirectory() as index_dir:
+                utils_search.INDEX_DIR = index_dir
+                utils_search.INDEX_TUNING_FILE = os.path.join(index_dir, 'tuning.json')
+                for size in sorted(options['sizes']):
+                    self.stdout.write(f"Generating {size} documents...")
+                    benchmarks.create_corpus(size, seed=options['seed'])
+                    for result in benchmarks.run_benchmarks(size, options['repeat'], options['only']):
+                        results.append(result)
+                        self.stdout.write(
+                            f"  {result['name']:<30} median {result['median_ms']:>11.2f} ms  "
+                            f"p95 {result['p95_ms']:>11.2f} ms"
+                        )
+        finally:
+            utils_search.INDEX_DIR, utils_search.INDEX_TUNING_FILE = old_paths
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'revision': git_revision(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'encoder_backend': utils_search.ENCODER_BACKEND,
+            'queries': len(benchmarks.QUERIES),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if baseline is not None:
+            regressions = benchmarks.compare_results(results, baseline, options['tolerance'])
+            for result, before in regressions:
+                self.stderr.write(
+                    f"{result['name']} @ {result['size']}: {before['median_ms']:.2f} ms -> "
+                    f"{result['median_ms']:.2f} ms"
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed beyond {options['tolerance']:.0%}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from ocr_app import utils_search
+
+
+class Command(BaseCommand):
+    help = "Build the search index and publish it as an on-disk snapshot for workers to load"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Rebuild even if the published snapshot can be brought up to date",
+        )
+
+    def handle(self, *args, **options):
+        if not options['force'] and utils_search.load_index_snapshot():
+            if not utils_search.sync_index():
+                self.stdout.write("Search index snapshot is up to date.")
+                return
+            state = utils_search.current_index_state()
+        else:
+            utils_search.index_documents()
+            utils_search.sync_index()
+            state = utils_search.current_index_state()
+
+        if utils_search.save_index_snapshot(state):
+            total = state.index.ntotal if state.index is not None else 0
+            self.stdout.write(self.style.SUCCESS(f"Search index snapshot written ({total} vectors)."))
+        else:
+            self.stderr.write("No index was built; nothing to write.")
@@ -0,0 +1,72 @@
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ocr_app import embedding_service, utils_search
+
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the sentence encoder and vector search to the web workers over a Unix "
+        "socket, micro-batching concurrent requests. Workers still load their own index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=getattr(settings, 'SEARCH_EMBEDDING_SOCKET', None),
+            help="Socket path (default: SEARCH_EMBEDDING_SOCKET)",
+        )
+        parser.add_argument(
+            '--batch-window-ms',
+            type=float,
+            default=embedding_service.BATCH_WINDOW * 1000,
+            help="How long to wait for more requests before encoding a batch",
+        )
+        parser.add_argument(
+            '--max-batch',
+            type=int,
+            default=embedding_service.MAX_BATCH,
+            help="Most texts encoded in one model call",
+        )
+        parser.add_argument('--skip-index', action='store_true', help="Do not load the index before serving")
+
+    def handle(self, *args, **options):
+        path = options['socket']
+        if not path:
+            raise CommandError("No socket path; pass --socket or set SEARCH_EMBEDDING_SOCKET.")
+
+        batcher = embedding_service.EncodeBatcher(
+            utils_search.encode_local,
+            window=options['batch_window_ms'] / 1000,
+            max_batch=options['max_batch'],
+        )
+        utils_search.serve_embeddings(batcher)
+
+        # Load everything before accepting requests
+        utils_search.get_sbert_model()
+        if not options['skip_index']:
+            utils_search.ensure_index(wait=True)
+
+        server = embedding_service.EmbeddingServer(
+            path, utils_search.EMBEDDING_MODEL_NAME, batcher, utils_search.semantic_search
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving {utils_search.EMBEDDING_MODEL_NAME} on {path} (pid {os.getpid()})"
+        ))
+        # Container stops send SIGTERM; exit through the cleanup below
+        signal.signal(signal.SIGTERM, _stop)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
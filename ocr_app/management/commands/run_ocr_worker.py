@@ -0,0 +1,75 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from ocr_app import ocr_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued OCR and text extraction jobs for uploaded documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'OCR_WORKER_CONCURRENCY', 2),
+            help="Jobs processed at the same time (default: OCR_WORKER_CONCURRENCY)",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=ocr_jobs.POLL_INTERVAL,
+            help="Seconds between queue checks while it is empty",
+        )
+        parser.add_argument(
+            '--drain',
+            action='store_true',
+            help="Exit once no job is due instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        prefix = ocr_jobs.worker_prefix()
+        stop = threading.Event()
+
+        def _stop(signum, frame):
+            stop.set()
+
+        # Finish the jobs in hand on SIGTERM or Ctrl+C, then exit
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        ocr_jobs.requeue_stale_jobs()
+        threads = [
+            threading.Thread(
+                target=ocr_jobs.work,
+                args=(f"{prefix}:{i}", stop, options['poll_interval'], options['drain']),
+                name=f'ocr-worker-{i}',
+            )
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(self.style.SUCCESS(f"OCR worker {prefix} running {concurrency} job(s) at a time"))
+
+        # Heartbeats continue after a stop until the jobs in hand are finished
+        last_heartbeat = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+            if time.monotonic() - last_heartbeat < ocr_jobs.HEARTBEAT_INTERVAL:
+                continue
+            last_heartbeat = time.monotonic()
+            close_old_connections()
+            ocr_jobs.heartbeat(prefix)
+            requeued, failed = ocr_jobs.requeue_stale_jobs()
+            if requeued or failed:
+                self.stdout.write(f"Requeued {requeued} and failed {failed} job(s) of stopped workers")
+
+        self.stdout.write("OCR worker stopped.")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ocr_app import utils_ocr, utils_search
+from ocr_app.lazy import load_timings, record_load
+
+
+class Command(BaseCommand):
+    help = "Load the search and OCR stack and report how long each part takes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-index',
+            action='store_true',
+            help="Do not load or build the search index",
+        )
+        parser.add_argument(
+            '--skip-ocr',
+            action='store_true',
+            help="Do not import the OCR dependencies",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        utils_search.get_sbert_model()
+        utils_search.faiss._load()
+        if not options['skip_index']:
+            utils_search.ensure_index(wait=True)
+        if not options['skip_ocr']:
+            for module in (utils_ocr.cv2, utils_ocr.pytesseract, utils_ocr.fitz, utils_ocr.docx):
+                module._load()
+            engine_start = time.perf_counter()
+            engine = utils_ocr.get_ocr_engine()
+            record_load(f"OCR engine ({engine.name})", time.perf_counter() - engine_start)
+
+        total = time.perf_counter() - start
+        for name, seconds in load_timings().items():
+            self.stdout.write(f"{name:<40} {seconds * 1000:>10.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{'total':<40} {total * 1000:>10.1f} ms"))
@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ocr_app import utils_search
+from ocr_app.models import DocumentEmbedding
+
+NPROBE_GRID = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def search_grid(kind, factory):
+    """Search parameter settings to try for an index type"""
+    if kind in ('ivf', 'ivfpq'):
+        nlist = int(factory.split(',')[0][3:])
+        return [{'nprobe': n} for n in NPROBE_GRID if n <= nlist]
+    if kind == 'ivf_hnsw':
+        nlist = int(factory.split('_')[0][3:])
+        return [{'nprobe': n, 'quantizer_efSearch': max(64, 2 * n)} for n in NPROBE_GRID if n <= nlist]
+    return [{}]
+
+
+class Command(BaseCommand):
+    help = "Measure recall@k and latency of ANN index types on the stored vectors and persist the best"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=10, help="Neighbours compared against exact search")
+        parser.add_argument('--queries', type=int, default=200, help="Held-out vectors used as queries")
+        parser.add_argument(
+            '--target-recall',
+            type=float,
+            default=0.95,
+            help="Pick the lowest p99 latency among settings reaching this recall",
+        )
+        parser.add_argument(
+            '--max-vectors',
+            type=int,
+            default=200000,
+            help="Sample at most this many stored vectors",
+        )
+        parser.add_argument(
+            '--types',
+            nargs='+',
+            help="Only try these index types (flat, ivf, ivf_hnsw, ivfpq)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Report without persisting the choice")
+
+    def load_vectors(self, limit):
+        stored = DocumentEmbedding.objects.filter(model_name=utils_search.EMBEDDING_MODEL_NAME)
+        if stored.count() > limit:
+            stored = stored.order_by('?')
+        vectors = [
+            np.frombuffer(vector, dtype='float32')
+            for vector in stored.values_list('vector', flat=True)[:limit].iterator(chunk_size=5000)
+        ]
+        if not vectors:
+            raise CommandError("No stored embeddings; run build_search_index first.")
+        return np.vstack(vectors)
+
+    def handle(self, *args, **options):
+        k = options['k']
+        vectors = self.load_vectors(options['max_vectors'])
+
+        # Hold queries out of the indexed set so they are not trivially found
+        rng = np.random.default_rng(0)
+        order = rng.permutation(len(vectors))
+        n_queries = min(options['queries'], len(vectors) // 10)
+        if n_queries < 1 or len(vectors) - n_queries < k:
+            raise CommandError(f"Too few stored vectors ({len(vectors)}) to tune.")
+        queries = vectors[order[:n_queries]]
+        base = vectors[order[n_queries:]]
+        ids = np.arange(len(base), dtype='int64')
+        n_vectors, dim = base.shape
+
+        exact = utils_search.faiss.IndexFlatL2(dim)
+        exact.add(base)
+        _, truth = exact.search(queries, k)
+
+        candidates = utils_search.index_candidates(n_vectors, dim)
+        if options['types']:
+            candidates = {kind: f for kind, f in candidates.items() if kind in options['types']}
+
+        self.stdout.write(f"{n_vectors} vectors, dim {dim}, {n_queries} queries, recall@{k}")
+        self.stdout.write(
+            f"{'type':<9} {'factory':<26} {'params':<44} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'MiB':>7}"
+        )
+
+        results = []
+        for kind, factory in candidates.items():
+            candidate = utils_search.get_fast_index(base, n_vectors, factory=factory)
+            candidate.add_with_ids(base, ids)
+            size_mib = len(utils_search.faiss.serialize_index(candidate)) / (1024 * 1024)
+
+            for params in search_grid(kind, factory):
+                utils_search.apply_search_params(candidate, params)
+                found = np.empty((n_queries, k), dtype='int64')
+                latencies = []
+                for i in range(n_queries):
+                    start = time.perf_counter()
+                    _, neighbours = candidate.search(queries[i:i + 1], k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    found[i] = neighbours[0]
+
+                recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(n_queries)])
+                result = {
+                    'type': kind,
+                    'factory': factory,
+                    'params': params,
+                    'recall': round(float(recall), 4),
+                    'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+                    'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+                    'size_mib': round(size_mib, 2),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"{kind:<9} {factory:<26} {str(params):<44} {result['recall']:>7.4f} "
+                    f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} {size_mib:>7.2f}"
+                )
+
+        if not results:
+            raise CommandError("No index types to try.")
+
+        passing = [r for r in results if r['recall'] >= options['target_recall']]
+        if passing:
+            best = min(passing, key=lambda r: (r['p99_ms'], r['size_mib']))
+        else:
+            self.stderr.write(f"No setting reached recall {options['target_recall']}; using the best recall.")
+            best = max(results, key=lambda r: (r['recall'], -r['p99_ms']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Chosen: {best['factory']} {best['params']} "
+            f"(recall {best['recall']}, p99 {best['p99_ms']} ms)"
+        ))
+        if options['dry_run']:
+            return
+
+        utils_search.save_index_tuning({
+            'factory': best['factory'],
+            'params': best['params'],
+            'recall': best['recall'],
+            'k': k,
+            'p50_ms': best['p50_ms'],
+            'p99_ms': best['p99_ms'],
+            'n_vectors': n_vectors,
+            'dim': dim,
+            'model': utils_search.EMBEDDING_MODEL_NAME,
+            'tuned_at': timezone.now().isoformat(),
+        })
+        self.stdout.write(
+            f"Saved to {utils_search.INDEX_TUNING_FILE}; search parameters apply immediately, "
+            "the index type on the next build_search_index --force."
+        )
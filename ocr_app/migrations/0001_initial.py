@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('archievesystem', '0011_document_postgres_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=200)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='archievesystem.document')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('document', 'model_name'), name='unique_document_embedding')],
+            },
+        ),
+    ]
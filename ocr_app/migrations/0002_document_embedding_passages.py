@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archievesystem', '0011_document_postgres_search'),
+        ('ocr_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='documentembedding',
+            name='unique_document_embedding',
+        ),
+        migrations.AddField(
+            model_name='documentembedding',
+            name='passage',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='documentembedding',
+            constraint=models.UniqueConstraint(fields=('document', 'model_name', 'passage'), name='unique_document_passage_embedding'),
+        ),
+    ]
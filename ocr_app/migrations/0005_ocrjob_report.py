@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0004_ocrresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocrjob',
+            name='report',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0005_ocrjob_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_id', models.BigIntegerField(blank=True, null=True)),
+                ('previous_version', models.BigIntegerField(blank=True, null=True)),
+                ('previous_terms', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['document_id', 'previous_version'], name='search_change_version')],
+            },
+        ),
+    ]
@@ -1,3 +1,124 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
+
+
+class DocumentEmbedding(models.Model):
+    """Stored encoder output for one passage of a document's search text.
+
+    ``content_hash`` is the SHA-256 of the exact text fed to the encoder, so
+    a rebuild only re-encodes passages whose text (or model) changed.
+    """
+    document = models.ForeignKey(
+        'archievesystem.Document',
+        on_delete=models.CASCADE,
+        related_name='embeddings'
+    )
+    passage = models.PositiveIntegerField(default=0)
+    model_name = models.CharField(max_length=200)
+    content_hash = models.CharField(max_length=64)
+    vector = models.BinaryField()  # float32 bytes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'model_name', 'passage'], name='unique_document_passage_embedding'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id}:{self.passage} - {self.model_name}"
+
+
+class OcrJob(models.Model):
+    """Text extraction for an uploaded document, run by ``run_ocr_worker``.
+
+    Workers claim a queued job by switching it to running in one conditional
+    UPDATE, so the table doubles as the queue. ``heartbeat_at`` is refreshed
+    while the worker process is alive; running jobs without a recent
+    heartbeat are requeued.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    document = models.ForeignKey(
+        'archievesystem.Document',
+        on_delete=models.CASCADE,
+        related_name='ocr_jobs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=50, blank=True, default='')
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True, default='')
+    # OCR passes and peak image memory of the last run (see utils_ocr.extract_text)
+    report = models.JSONField(blank=True, default=dict)
+    worker = models.CharField(max_length=200, blank=True, default='')
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='ocr_job_queue'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} - {self.status}"
+
+
+class OcrResult(models.Model):
+    """Text extracted from a file, keyed by its SHA-256 and the OCR version.
+
+    Re-uploads of the same file reuse it instead of running OCR again; a new
+    ``ocr_version`` (engine release or pipeline change) misses the cache.
+    """
+    content_hash = models.CharField(max_length=64)
+    ocr_version = models.CharField(max_length=100)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'ocr_version'], name='unique_ocr_result'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} - {self.ocr_version}"
+
+
+class SearchIndexChange(models.Model):
+    """A committed change to an indexed document, numbered by ``id``.
+
+    Rows are written in the same transaction as the change. Every process
+    applies rows it has not seen to its own in-memory search index, so an
+    edit made by the OCR worker or another web worker reaches all of them
+    without a shared snapshot directory. ``previous_version`` is the
+    ``modified_at`` (in microseconds) of the version the change replaced
+    and ``previous_terms`` its term list, so an index still holding that
+    version can subtract its term counts. Rows without a document only
+    invalidate cached results (entity and department renames).
+    """
+    document_id = models.BigIntegerField(null=True, blank=True)
+    previous_version = models.BigIntegerField(null=True, blank=True)
+    previous_terms = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['document_id', 'previous_version'], name='search_change_version'),
+        ]
+
+    def __str__(self):
+        return f"{self.pk} - {self.document_id}"
@@ -0,0 +1,87 @@
+"""Canonical Arabic/English text normalization shared by indexing and search.
+
+Stored search columns, index terms and queries must all go through
+``advanced_normalize_text`` so they agree on one canonical form. Bump
+``NORMALIZATION_VERSION`` whenever that form changes.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import unquote
+
+NORMALIZATION_VERSION = 2
+
+# Harakat, Quranic marks, tatweel and zero-width/direction marks are dropped
+_REMOVED = re.compile(r'[\u064B-\u0652\u0670\u0640\u06D6-\u06ED\u08F0-\u08FF\u200C-\u200F]')
+
+# Letter variants folded to one form. str.translate takes CPython's slow
+# per-character path on Arabic text; guarded str.replace calls are ~6x faster
+_LETTERS = (
+    ('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'),
+    ('ة', 'ه'),
+    ('ى', 'ي'), ('ئ', 'ي'), ('ؤ', 'و'),
+    ('ک', 'ك'), ('ی', 'ي'), ('ے', 'ي'),
+)
+
+# Anything but word characters, Arabic blocks, "_" and "-" (whitespace included) collapses to one space
+_SEPARATORS = re.compile(r'[^\w\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]+')
+
+# Joins texts in normalize_many; private use, so normalization never produces it
+_BATCH_SEPARATOR = '\uE000'
+_BATCH_SEPARATORS = re.compile(r'[^\w\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uE000_-]+')
+
+# Filenames, titles, terms and queries are short and repeat, so they are memoized
+SHORT_TEXT_LENGTH = 128
+
+
+def _unquote(text):
+    """Decode URL-encoded text (at most three nested levels)"""
+    for _ in range(3):
+        if '%' not in text:
+            break
+        try:
+            decoded = unquote(text)
+        except Exception:
+            break
+        if decoded == text:
+            break
+        text = decoded
+    return text
+
+
+def _fold(text):
+    """Drop marks and fold letter variants"""
+    text = _REMOVED.sub('', text)
+    for variant, letter in _LETTERS:
+        if variant in text:
+            text = text.replace(variant, letter)
+    return text.lower()
+
+
+def _normalize(text):
+    return _SEPARATORS.sub(' ', _fold(_unquote(text))).strip()
+
+
+@lru_cache(maxsize=8192)
+def _normalize_short(text):
+    return _normalize(text)
+
+
+def advanced_normalize_text(text):
+    """Arabic text normalization with special character preservation"""
+    if not text:
+        return ""
+    if len(text) <= SHORT_TEXT_LENGTH:
+        return _normalize_short(text)
+    return _normalize(text)
+
+
+def normalize_many(texts):
+    """``advanced_normalize_text`` over a sequence, folded and split in one pass"""
+    texts = [
+        _unquote(text).replace(_BATCH_SEPARATOR, ' ') if text else ''
+        for text in texts
+    ]
+    if not texts:
+        return []
+    joined = _BATCH_SEPARATORS.sub(' ', _fold(_BATCH_SEPARATOR.join(texts)))
+    return [part.strip() for part in joined.split(_BATCH_SEPARATOR)]
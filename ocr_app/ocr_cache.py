@@ -0,0 +1,37 @@
+"""Extracted text cached by file content, so re-uploads skip OCR.
+
+Entries are keyed by the upload's SHA-256 (see ``upload_handlers``) and
+``utils_ocr.ocr_version()``; upgrading Tesseract or bumping
+``OCR_PIPELINE_VERSION`` makes old entries miss.
+"""
+from .models import OcrResult
+from .utils_ocr import extract_text, ocr_version
+
+
+def cached_text(content_hash):
+    """Cached text for a file's content, or None"""
+    if not content_hash:
+        return None
+    return OcrResult.objects.filter(
+        content_hash=content_hash, ocr_version=ocr_version()
+    ).values_list('text', flat=True).first()
+
+
+def store_text(content_hash, text):
+    # Empty text is what a failed extraction returns too; leave it uncached
+    if not content_hash or not text.strip():
+        return
+    OcrResult.objects.update_or_create(
+        content_hash=content_hash, ocr_version=ocr_version(), defaults={'text': text}
+    )
+
+
+def extract_text_cached(content_hash, file_name, source, progress=None, report=None):
+    """``extract_text`` that reuses and fills the cache"""
+    text = cached_text(content_hash)
+    if text is None:
+        text = extract_text(file_name, source, progress, report)
+        store_text(content_hash, text)
+    elif report is not None:
+        report['cached'] = True
+    return text
@@ -0,0 +1,201 @@
+"""Database-backed queue for OCR and text extraction.
+
+Uploads store the file, save the document as processing and create an
+``OcrJob``; ``run_ocr_worker`` processes poll the table, extract the text
+and save it on the document, which indexes it for search. No broker is
+needed: a worker claims a job by moving it from queued to running in a
+conditional UPDATE that only one worker can win.
+"""
+import os
+import socket
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from archievesystem.models import Document
+
+from .models import OcrJob
+from .ocr_cache import extract_text_cached
+from .upload_handlers import file_sha256
+
+MAX_ATTEMPTS = getattr(settings, 'OCR_JOB_MAX_ATTEMPTS', 3)
+RETRY_DELAY = getattr(settings, 'OCR_JOB_RETRY_DELAY', 30)  # seconds, doubled after each failed attempt
+# Running jobs whose worker process sent no heartbeat for this long are requeued
+JOB_TIMEOUT = getattr(settings, 'OCR_JOB_TIMEOUT', 120)  # seconds
+HEARTBEAT_INTERVAL = 15  # seconds
+POLL_INTERVAL = 2  # seconds between claims while the queue is empty
+
+
+def worker_prefix():
+    """Identifies this process in ``OcrJob.worker``"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_document(document, max_attempts=None):
+    """Mark a saved document as processing and queue its text extraction"""
+    if document.processing_status != Document.PROCESSING:
+        Document.objects.filter(pk=document.pk).update(processing_status=Document.PROCESSING)
+        document.processing_status = Document.PROCESSING
+    return OcrJob.objects.create(document=document, max_attempts=max_attempts or MAX_ATTEMPTS)
+
+
+def claim_job(worker):
+    """Switch the next due job to running for ``worker``; None when nothing is due"""
+    while True:
+        now = timezone.now()
+        job_id = OcrJob.objects.filter(
+            status=OcrJob.QUEUED, run_after__lte=now
+        ).order_by('run_after', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        # Another worker may have claimed it since the read; then try the next one
+        claimed = OcrJob.objects.filter(id=job_id, status=OcrJob.QUEUED).update(
+            status=OcrJob.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            stage='',
+            progress=0,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return OcrJob.objects.select_related('document').get(id=job_id)
+
+
+def report_progress(job, stage, progress):
+    job.stage, job.progress = stage, progress
+    OcrJob.objects.filter(pk=job.pk, worker=job.worker).update(
+        stage=stage, progress=progress, heartbeat_at=timezone.now()
+    )
+
+
+def _finish(job, **fields):
+    """Record the outcome unless the job was requeued and claimed elsewhere meanwhile"""
+    now = timezone.now()
+    fields.setdefault('finished_at', now)
+    return OcrJob.objects.filter(pk=job.pk, worker=job.worker, status=OcrJob.RUNNING).update(
+        heartbeat_at=now, **fields
+    )
+
+
+def run_job(job):
+    """Extract the document's text and save it; returns whether it succeeded"""
+    try:
+        document = job.document
+        report_progress(job, 'reading', 5)
+        # Remote storages only hand out streams; the extractors want a seekable one
+        with document.file.open('rb') as f:
+            source = BytesIO(f.read())
+        content_hash = document.content_hash or file_sha256(File(source))
+
+        report_progress(job, 'extracting', 20)
+        report = {}
+        text = extract_text_cached(
+            content_hash,
+            document.file.name,
+            source,
+            progress=lambda done, total: report_progress(job, 'extracting', 20 + 70 * done // total),
+            report=report
+        )
+
+        report_progress(job, 'saving', 90)
+        # Reload so edits made while the job ran are kept
+        document.refresh_from_db()
+        document.extracted_text = text
+        document.processing_status = Document.READY
+        document.content_hash = content_hash
+        # modified_at is the version search indexes record, so it has to advance too
+        document.save(update_fields=[
+            'extracted_text', 'processing_status', 'content_hash', 'modified_at', *Document.SEARCH_FIELDS
+        ])
+    except Document.DoesNotExist:
+        _finish(job, status=OcrJob.FAILED, error="Document was deleted")
+        return False
+    except Exception as e:
+        print(f"OCR job {job.pk} error: {e}")
+        fail_job(job, str(e))
+        return False
+
+    _finish(job, status=OcrJob.DONE, stage='', progress=100, error='', report=report)
+    return True
+
+
+def fail_job(job, error):
+    """Retry with exponential backoff, or give up after ``max_attempts``"""
+    job.refresh_from_db(fields=['attempts', 'max_attempts'])
+    if job.attempts < job.max_attempts:
+        delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+        _finish(
+            job,
+            status=OcrJob.QUEUED,
+            error=error,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            finished_at=None,
+        )
+    elif _finish(job, status=OcrJob.FAILED, error=error):
+        Document.objects.filter(pk=job.document_id).update(processing_status=Document.FAILED)
+
+
+def heartbeat(prefix):
+    """Keep the running jobs of this worker process from being requeued"""
+    return OcrJob.objects.filter(status=OcrJob.RUNNING, worker__startswith=prefix).update(
+        heartbeat_at=timezone.now()
+    )
+
+
+def requeue_stale_jobs():
+    """Requeue running jobs whose worker process died; fail those out of attempts"""
+    stale = OcrJob.objects.filter(
+        status=OcrJob.RUNNING, heartbeat_at__lt=timezone.now() - timedelta(seconds=JOB_TIMEOUT)
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=OcrJob.QUEUED, worker='', error="Worker stopped responding"
+    )
+    failed_documents = list(stale.values_list('document_id', flat=True))
+    if failed_documents:
+        stale.update(status=OcrJob.FAILED, error="Worker stopped responding", finished_at=timezone.now())
+        Document.objects.filter(pk__in=failed_documents).update(processing_status=Document.FAILED)
+    return requeued, len(failed_documents)
+
+
+def work(worker, stop, poll_interval=POLL_INTERVAL, drain=False):
+    """Process jobs until ``stop`` is set, or with ``drain`` until nothing is due"""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            job = claim_job(worker)
+            if job is None:
+                if drain:
+                    return
+                stop.wait(poll_interval)
+                continue
+            run_job(job)
+    finally:
+        connection.close()
+
+
+def job_status(document):
+    """Processing state of a document and its latest extraction job"""
+    job = document.ocr_jobs.order_by('-id').first()
+    return {
+        'document_id': document.pk,
+        'processing_status': document.processing_status,
+        'job': job and {
+            'id': job.pk,
+            'status': job.status,
+            'stage': job.stage,
+            'progress': job.progress,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'error': job.error,
+            'report': job.report,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+        },
+    }
@@ -0,0 +1,98 @@
+import pickle
+from bisect import bisect_left
+
+import numpy as np
+
+# Bump when the pickled layout changes
+PREFIX_INDEX_VERSION = 1
+
+# Prefixes this short match too many keys to scan, so their top terms are precomputed
+PRECOMPUTED_PREFIX_LENGTH = 2
+MAX_COMPLETIONS = 20
+
+
+class PrefixIndex:
+    """Frequency-weighted completions over a sorted array of folded keys.
+
+    A term can be reachable from several keys (e.g. with and without the
+    Arabic article); folding the keys and the typed prefix is left to
+    ``utils_search`` so completions and search share one analyzer.
+    """
+
+    def __init__(self, entries):
+        """Build from ``(key, term, weight)`` triples"""
+        entries = sorted(entries)
+        self.keys = [key for key, _, _ in entries]
+        self.terms = [term for _, term, _ in entries]
+        self.weights = np.array([weight for _, _, weight in entries], dtype=np.int64)
+
+        self.top = {}
+        for position, key in enumerate(self.keys):
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                self.top.setdefault(key[:length], []).append(position)
+        for prefix, positions in self.top.items():
+            self.top[prefix] = self._best(positions, MAX_COMPLETIONS)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _range(self, prefix):
+        """Positions of the keys starting with ``prefix``"""
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\U0010ffff', start)
+        return start, end
+
+    def _best(self, positions, limit):
+        """Positions ordered by weight, one per term"""
+        ranked = []
+        seen = set()
+        for position in sorted(positions, key=lambda p: -self.weights[p]):
+            if self.terms[position] not in seen:
+                seen.add(self.terms[position])
+                ranked.append(position)
+                if len(ranked) >= limit:
+                    break
+        return ranked
+
+    def complete(self, prefix, limit=8):
+        """Up to ``limit`` ``(term, weight)`` pairs for a folded prefix, most frequent first"""
+        if not prefix or limit <= 0:
+            return []
+
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH and limit <= MAX_COMPLETIONS:
+            positions = self.top.get(prefix, [])[:limit]
+        else:
+            start, end = self._range(prefix)
+            if start == end:
+                return []
+            weights = self.weights[start:end]
+            # Extra candidates make room for terms reachable from several keys
+            wanted = min(len(weights), limit * 3)
+            if wanted < len(weights):
+                candidates = np.argpartition(-weights, wanted - 1)[:wanted]
+            else:
+                candidates = np.arange(len(weights))
+            positions = self._best((start + candidates).tolist(), limit)
+
+        return [(self.terms[p], int(self.weights[p])) for p in positions]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(
+                (PREFIX_INDEX_VERSION, self.keys, self.terms, self.weights, self.top),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            version, keys, terms, weights, top = pickle.load(f)
+        if version != PREFIX_INDEX_VERSION:
+            raise ValueError(f"Unsupported prefix index version {version}")
+        completions = cls([])
+        completions.keys = keys
+        completions.terms = terms
+        completions.weights = weights
+        completions.top = top
+        return completions
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+from .search_cache import cached_search
+from .utils_search import advanced_normalize_text, lexical_search
+
+
+def filter_documents(queryset, filters):
+    """Apply ``parse_filters`` values in SQL; every backend filters the same way"""
+    return queryset.filter(**filters) if filters else queryset
+
+
+class PythonSearchBackend:
+    """In-process inverted index plus icontains on title and number.
+
+    Index hits are ranked by their lexical score; documents matched only
+    by icontains follow them.
+    """
+
+    name = 'python'
+
+    def filter_queryset(self, queryset, query, filters=None):
+        # Filtering inside the search keeps its top results from being spent on excluded documents
+        ranked = cached_search('lexical_scores', query, lambda: lexical_search(query, filters), filters)
+        return filter_documents(queryset, filters).filter(
+            Q(id__in=[doc_id for doc_id, _ in ranked]) |
+            Q(title__icontains=query) |
+            Q(document_number__icontains=query)
+        ).annotate(
+            search_score=Case(
+                *[When(id=doc_id, then=Value(score)) for doc_id, score in ranked],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        ).order_by('-search_score', '-id')
+
+
+class PostgresSearchBackend:
+    """Full-text search on the search_vector column with trigram fuzziness.
+
+    Needs migration 0011, which adds the generated ``search_vector`` column,
+    its GIN index and ``pg_trgm`` indexes on search_title and document_number.
+    Rows are selected with the operators those indexes serve (``@@`` and
+    ``%``, bounded by ``pg_trgm.similarity_threshold``); ``similarity()``
+    only ranks them.
+    """
+
+    name = 'postgres'
+    config = 'simple'
+    trigram_threshold = 0.3
+
+    def set_trigram_threshold(self):
+        """Minimum similarity of the ``%`` operator on this connection"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, false)",
+                [str(self.trigram_threshold)]
+            )
+
+    def filter_queryset(self, queryset, query, filters=None):
+        # Same canonical form the search columns were written with
+        normalized = advanced_normalize_text(query)
+        if not normalized:
+            return queryset.none()
+
+        self.set_trigram_threshold()
+        column = f'{connection.ops.quote_name(queryset.model._meta.db_table)}.search_vector'
+        search_query = SearchQuery(normalized, config=self.config, search_type='plain')
+
+        return filter_documents(queryset, filters).annotate(
+            document_vector=RawSQL(column, [], output_field=SearchVectorField()),
+        ).filter(
+            Q(document_vector=search_query) |
+            Q(search_title__trigram_similar=normalized) |
+            Q(document_number__trigram_similar=query)
+        ).annotate(
+            search_score=Greatest(
+                SearchRank(F('document_vector'), search_query),
+                TrigramSimilarity('search_title', normalized),
+                TrigramSimilarity('document_number', query),
+                output_field=FloatField()
+            )
+        ).order_by('-search_score', '-id')
+
+
+def get_search_backend():
+    """Backend named by settings.SEARCH_BACKEND; Postgres falls back to Python elsewhere"""
+    if getattr(settings, 'SEARCH_BACKEND', 'python') == 'postgres' and connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return PythonSearchBackend()
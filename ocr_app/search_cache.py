@@ -0,0 +1,85 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import caches
+
+from .utils_search import advanced_normalize_text, refresh_index
+
+SEARCH_CACHE_ALIAS = 'search'
+GENERATION_KEY = 'search:generation'
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+_MISSING = object()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def search_cache_stats():
+    """Hit/miss counters of this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    stats['generation'] = search_generation()
+
+    cache = caches[SEARCH_CACHE_ALIAS]
+    if hasattr(cache, 'total_bytes'):
+        stats['bytes'] = cache.total_bytes
+    return stats
+
+
+def search_generation():
+    """Current generation; cached results from older generations are never read"""
+    cache = caches[SEARCH_CACHE_ALIAS]
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so a lost counter never reuses an old generation
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_search_generation():
+    """Invalidate every cached search result"""
+    cache = caches[SEARCH_CACHE_ALIAS]
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+    _count('invalidations')
+
+
+def _search_key(kind, query, filters, generation):
+    raw = json.dumps(
+        [kind, advanced_normalize_text(query), query.strip().lower(), filters or {}],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f"search:{generation}:{kind}:{digest}"
+
+
+def cached_search(kind, query, compute, filters=None):
+    """Return ``compute()`` for this query, reusing a result of the current generation"""
+    # Changes made by other processes invalidate this process's results once applied
+    refresh_index()
+
+    cache = caches[SEARCH_CACHE_ALIAS]
+    key = _search_key(kind, query, filters, search_generation())
+
+    result = cache.get(key, _MISSING)
+    if result is not _MISSING:
+        _count('hits')
+        return result
+
+    _count('misses')
+    result = compute()
+    cache.set(key, result)
+    return result
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from archievesystem.models import (
+    Document, InternalEntity, InternalDepartment, ExternalEntity, ExternalDepartment
+)
+from .utils_search import INDEXED_FIELDS, record_index_change, schedule_index_sync
+
+
+def _indexed_fields(doc):
+    fields = {name: getattr(doc, name) for name in INDEXED_FIELDS}
+    fields['file'] = doc.file.name if doc.file else None
+    fields['modified_at'] = doc.modified_at
+    return fields
+
+
+@receiver(pre_save, sender=Document)
+def remember_indexed_content(sender, instance, **kwargs):
+    """Keep the version this save replaces so indexes holding it can subtract its terms"""
+    instance._search_previous = None
+    if instance.pk:
+        previous = Document.objects.filter(pk=instance.pk).values('modified_at', *INDEXED_FIELDS).first()
+        if previous:
+            instance._search_previous = previous
+
+
+@receiver(post_save, sender=Document)
+def index_saved_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_index_change(instance.pk, getattr(instance, '_search_previous', None))
+    transaction.on_commit(schedule_index_sync)
+
+
+@receiver(post_delete, sender=Document)
+def unindex_deleted_document(sender, instance, **kwargs):
+    record_index_change(instance.pk, _indexed_fields(instance))
+    transaction.on_commit(schedule_index_sync)
+
+
+@receiver(post_save, sender=InternalEntity)
+@receiver(post_save, sender=InternalDepartment)
+@receiver(post_save, sender=ExternalEntity)
+@receiver(post_save, sender=ExternalDepartment)
+@receiver(post_delete, sender=InternalEntity)
+@receiver(post_delete, sender=InternalDepartment)
+@receiver(post_delete, sender=ExternalEntity)
+@receiver(post_delete, sender=ExternalDepartment)
+def invalidate_search_cache(sender, **kwargs):
+    """Cached results embed entity and department names"""
+    record_index_change()
+    transaction.on_commit(schedule_index_sync)
@@ -1,3 +1,523 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import docx
+import numpy as np
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from archievesystem.models import CustomUser, Document, InternalDepartment, InternalEntity
+
+from . import ocr_jobs, utils_ocr, utils_search
+from .cache_backends import SizeBoundedLocMemCache
+from .models import OcrJob, SearchIndexChange
+from .normalization import advanced_normalize_text, normalize_many
+from .search_backends import PostgresSearchBackend
+from .search_cache import bump_search_generation, cached_search
+
+DIM = 32
+
+
+def fake_encode(texts):
+    """Bag-of-words vectors, so texts sharing words land close together without a model"""
+    vectors = np.zeros((len(texts), DIM), dtype='float32')
+    for row, text in enumerate(texts):
+        for word in text.split():
+            vectors[row, int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16) % DIM] += 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class InlineExecutor:
+    """Runs queued index work on the calling thread, inside the test transaction"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def reset_search_state():
+    """Forget the published index, as in a freshly started process"""
+    utils_search._index_state = utils_search.IndexState()
+    utils_search._working_state = None
+    utils_search._working_updates = 0
+    utils_search._sync_pending = False
+    utils_search._rebuild_future = None
+    utils_search._last_rebuild = 0.0
+    utils_search._last_sync = 0.0
+    utils_search._last_sync_request = 0.0
+    utils_search._loaded_snapshot = None
+    utils_search._filter_cache.clear()
+    utils_search.clear_embedding_cache()
+
+
+def docx_bytes(text):
+    document = docx.Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class SearchTestCase(TestCase):
+    """Search indexes in a temporary directory with a stand-in encoder"""
+
+    def setUp(self):
+        index_dir = tempfile.mkdtemp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        storage = override_settings(
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        for name, value in (
+            ('INDEX_DIR', index_dir),
+            ('INDEX_TUNING_FILE', os.path.join(index_dir, 'tuning.json')),
+            ('encode_local', fake_encode),
+            ('_embedding_client', None),
+            ('_update_executor', InlineExecutor()),
+        ):
+            patcher = mock.patch.object(utils_search, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        reset_search_state()
+        self.addCleanup(reset_search_state)
+        caches['search'].clear()
+
+        self.user = CustomUser.objects.create_user(username='archivist', email='archivist@example.com', password='x')
+        self.entity = InternalEntity.objects.create(name='Finance')
+        self.department = InternalDepartment.objects.create(name='Accounts', internal_entity=self.entity)
+
+    def create_document(self, number, title='memo', text='', content=b'-', file_name='memo.txt', elsewhere=False, **fields):
+        """Save a document and run the index catch-up its commit queues"""
+        document = Document(
+            title=title,
+            document_number=number,
+            entity_type=Document.INTERNAL,
+            internal_entity=self.entity,
+            internal_department=fields.pop('internal_department', self.department),
+            document_type='وارد',
+            uploaded_by=self.user,
+            extracted_text=text,
+            **fields
+        )
+        document.file.save(file_name, ContentFile(content), save=False)
+        with self.captureOnCommitCallbacks(execute=not elsewhere):
+            document.save()
+        return document
+
+    def save_elsewhere(self, document):
+        """Save as another process would: the change is logged, but this process is not told"""
+        with self.captureOnCommitCallbacks(execute=False):
+            document.save()
+
+    def lexical_ids(self, query, filters=None):
+        return [doc_id for doc_id, _ in utils_search.lexical_search(query, filters)]
+
+
+class NormalizationTests(TestCase):
+    TEXTS = [
+        'الْمُحَاسَبَةُ',
+        'مدرسة أحمد إلى الآن',
+        'Report%20Q3%2520final.pdf',
+        'تقرير_المالية-2024 (نهائي)',
+        'مـــــالية‏  ',
+        'Mixed العربية and English!!',
+        '',
+        None,
+        'x' * 200 + ' أإآ',
+    ]
+
+    def test_batch_matches_single_texts(self):
+        self.assertEqual(normalize_many(self.TEXTS), [advanced_normalize_text(text) for text in self.TEXTS])
+
+    def test_letter_variants_fold_together(self):
+        self.assertEqual(advanced_normalize_text('أحمد'), advanced_normalize_text('احمد'))
+        self.assertEqual(advanced_normalize_text('مدرسة'), advanced_normalize_text('مدرسه'))
+        self.assertEqual(advanced_normalize_text('المُحاسبة'), advanced_normalize_text('المحاسبة'))
+
+    def test_stored_columns_use_the_query_form(self):
+        fields = utils_search.compute_search_fields('documents/تقرير_أحمد.pdf', 'تقريرُ أحمد', 'نص')
+        self.assertEqual(fields['search_title'], advanced_normalize_text('تقرير احمد'))
+
+
+class LexicalSearchTests(SearchTestCase):
+    def test_title_match_adds_to_text_match(self):
+        in_text = self.create_document('L-1', title='minutes', text='the quarterly zebracorn budget')
+        in_title = self.create_document('L-2', title='zebracorn budget', text='zebracorn figures')
+        self.assertEqual(self.lexical_ids('zebracorn'), [in_title.pk, in_text.pk])
+
+    def test_filters_apply_inside_the_search(self):
+        other = InternalDepartment.objects.create(name='Payroll', internal_entity=self.entity)
+        kept = self.create_document('L-3', text='platypus procurement')
+        self.create_document('L-4', text='platypus procurement', internal_department=other)
+        self.assertEqual(self.lexical_ids('platypus', {'internal_department': self.department.pk}), [kept.pk])
+
+    def test_filename_matrix_matches_the_pairwise_scorer(self):
+        query_terms = ['تقرير', 'عقد_صيانة', 'budget']
+        vocabulary = ['مشتريات', 'تقارير', 'عقد', 'صيانة', 'budgets', 'report']
+        expected = [[utils_search.arabic_similarity_score(q, t) for t in vocabulary] for q in query_terms]
+        np.testing.assert_allclose(utils_search.batch_similarity_scores(query_terms, vocabulary), expected, atol=1e-3)
+
+    def test_filename_points_match_the_pairwise_scorer(self):
+        # Some variants of the query reach 50 against 'مشتريات' with a partial_ratio below 50
+        named = self.create_document('L-1', title='تقرير سنوي', text='تقرير سنوي', file_name='مشتريات.pdf')
+        plain = self.create_document('L-2', title='تقرير سنوي', text='تقرير سنوي')
+        query_terms = utils_search.enhanced_extract_search_terms(utils_search.advanced_normalize_text('تقرير سنوي'), 12)
+        similarity = [utils_search.arabic_similarity_score(term, 'مشتريات') for term in query_terms]
+
+        scores = dict(utils_search.lexical_search('تقرير سنوي'))
+        self.assertEqual(scores[named.pk] - scores[plain.pk], utils_search.similarity_points(np.array(similarity)).sum())
+
+    def test_edits_and_deletes_update_the_index(self):
+        document = self.create_document('L-5', text='original wording')
+        utils_search.ensure_index(wait=True)
+        document.extracted_text = 'revised narwhal wording'
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        self.assertEqual(self.lexical_ids('narwhal'), [document.pk])
+        self.assertEqual(self.lexical_ids('original'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.delete()
+        self.assertEqual(self.lexical_ids('narwhal'), [])
+
+
+class HybridSearchTests(SearchTestCase):
+    def test_fusion_prefers_documents_in_both_rankings(self):
+        fused = utils_search.fuse_rankings([(1.0, [1, 2, 3]), (1.0, [3, 4])])
+        self.assertEqual(fused[0][0], 3)
+        self.assertEqual({doc_id for doc_id, _ in fused}, {1, 2, 3, 4})
+
+    def test_results_combine_lexical_and_semantic_hits(self):
+        match = self.create_document('H-1', title='ledger', text='capybara grazing report')
+        results, suggestions = utils_search.hybrid_search('capybara grazing')
+        self.assertEqual(results[0]['id'], match.pk)
+        self.assertIn(match.pk, [suggestion['id'] for suggestion in suggestions])
+
+        lexical = dict(utils_search.lexical_search('capybara grazing'))
+        semantic = {doc_id: score for doc_id, score, _ in utils_search.semantic_search('capybara grazing', 20)}
+        self.assertEqual(results[0]['lexical_score'], lexical[match.pk])
+        self.assertEqual(results[0]['semantic_score'], semantic[match.pk])
+        self.assertEqual(results[0]['score'], round(2 / (utils_search.RRF_K + 1), 6))
+
+    def test_unrelated_neighbours_are_not_results(self):
+        match = self.create_document('H-1', title='ledger', text='capybara grazing report')
+        other = self.create_document('H-2', title='other', text='unrelated minutes of meeting')
+        results, suggestions = utils_search.hybrid_search('capybara grazing')
+        self.assertEqual([result['id'] for result in results], [match.pk])
+        self.assertIn(other.pk, [suggestion['id'] for suggestion in suggestions])
+
+        with mock.patch.object(utils_search, 'SEMANTIC_MIN_SCORE', 0):
+            results, _ = utils_search.hybrid_search('capybara grazing')
+        self.assertEqual(results[-1]['id'], other.pk)
+        self.assertIsNone(results[-1]['lexical_score'])
+
+
+    def test_filters_apply_inside_the_vector_search(self):
+        other = InternalDepartment.objects.create(name='Payroll', internal_entity=self.entity)
+        kept = self.create_document('H-3', text='platypus procurement')
+        moved = self.create_document('H-4', text='platypus procurement', internal_department=other)
+
+        hits = utils_search.semantic_search('platypus procurement', 4, {'internal_department': self.department.pk})
+        self.assertEqual([doc_id for doc_id, _, _ in hits], [kept.pk])
+
+        moved.internal_department = self.department
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        hits = utils_search.semantic_search('platypus procurement', 4, {'internal_department': other.pk})
+        self.assertEqual(hits, [])
+
+    def test_hnsw_is_not_offered_for_a_deletable_index(self):
+        candidates = utils_search.index_candidates(50000, DIM)
+        self.assertTrue(all(utils_search.supports_removal(factory) for factory in candidates.values()))
+        self.assertFalse(utils_search.supports_removal('IDMap2,HNSW32,SQfp16'))
+
+class SnapshotTests(SearchTestCase):
+    def test_fresh_process_loads_the_snapshot(self):
+        document = self.create_document('S-1', text='aardvark inventory')
+        utils_search.ensure_index(wait=True)
+        self.assertTrue(utils_search.save_index_snapshot())
+        reset_search_state()
+
+        with mock.patch.object(utils_search, 'index_documents') as build:
+            state = utils_search.ensure_index()
+        build.assert_not_called()
+        self.assertTrue(state.read_only)
+        self.assertEqual(self.lexical_ids('aardvark'), [document.pk])
+
+
+    def test_autocomplete_is_built_before_publishing(self):
+        self.create_document('S-4', text='wombatography survey')
+        utils_search.ensure_index(wait=True)
+        self.assertIsNotNone(utils_search.current_index_state().completions)
+        self.assertIn('wombatography', [term for term, _ in utils_search.autocomplete('wombat')])
+
+        utils_search.save_index_snapshot()
+        reset_search_state()
+        utils_search.ensure_index()
+        self.assertIn('wombatography', [term for term, _ in utils_search.autocomplete('wombat')])
+
+class SearchCacheTests(SearchTestCase):
+    def test_results_are_reused_until_the_generation_changes(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return ['result']
+
+        cached_search('lexical', 'query', compute)
+        cached_search('lexical', 'query', compute)
+        self.assertEqual(len(calls), 1)
+
+        bump_search_generation()
+        cached_search('lexical', 'query', compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_saving_a_document_invalidates_results(self):
+        self.create_document('C-1', text='okapi census')
+        first = cached_search('lexical', 'okapi', lambda: utils_search.lexical_search('okapi'))
+        added = self.create_document('C-2', text='okapi census')
+        second = cached_search('lexical', 'okapi', lambda: utils_search.lexical_search('okapi'))
+        self.assertEqual(len(first), 1)
+        self.assertIn(added.pk, [doc_id for doc_id, _ in second])
+
+    def test_byte_accounting_follows_incr_and_decr(self):
+        cache = SizeBoundedLocMemCache('test-sizes', {'OPTIONS': {'MAX_BYTES': 4096}})
+        self.addCleanup(cache.clear)
+        cache.set('counter', 1, None)
+        small = cache.total_bytes
+        cache.incr('counter', 10 ** 30)
+        self.assertGreater(cache.total_bytes, small)
+        cache.decr('counter', 10 ** 30)
+        self.assertEqual(cache.total_bytes, small)
+        cache.delete('counter')
+        self.assertEqual(cache.total_bytes, 0)
+
+
+class ChangeLogTests(SearchTestCase):
+    def test_a_stale_snapshot_is_caught_up_from_the_log(self):
+        first = self.create_document('G-1', text='original wording')
+        self.create_document('G-2', text='other wording')
+        utils_search.ensure_index(wait=True)
+        stale = utils_search.current_index_state()
+
+        # Another process edits the first document, then this one writes the last snapshot
+        first.extracted_text = 'revised narwhal wording'
+        self.save_elsewhere(first)
+        utils_search.save_index_snapshot(stale)
+
+        # A fresh process loads that snapshot instead of rebuilding, then catches up
+        reset_search_state()
+        with mock.patch.object(utils_search, 'build_index_state', side_effect=AssertionError):
+            utils_search.ensure_index()
+        self.assertEqual(self.lexical_ids('narwhal'), [first.pk])
+        self.assertEqual(self.lexical_ids('original'), [])
+
+    def test_changes_from_other_processes_reach_results_and_the_cache(self):
+        self.create_document('G-3', text='okapi census')
+        search = lambda: utils_search.lexical_search('okapi')
+        self.assertEqual(len(cached_search('lexical', 'okapi', search)), 1)
+
+        added = self.create_document('G-4', text='okapi census', elsewhere=True)
+        utils_search._last_sync_request = 0.0
+        self.assertIn(added.pk, [doc_id for doc_id, _ in cached_search('lexical', 'okapi', search)])
+
+        deleted = added.pk
+        with self.captureOnCommitCallbacks(execute=False):
+            added.delete()
+        utils_search._last_sync_request = 0.0
+        self.assertNotIn(deleted, [doc_id for doc_id, _ in cached_search('lexical', 'okapi', search)])
+
+    def test_term_counts_stay_exact_across_edits(self):
+        document = self.create_document('G-5', text='alpha beta gamma')
+        self.create_document('G-6', text='alpha delta')
+        utils_search.ensure_index(wait=True)
+
+        for text in ('beta epsilon', 'zeta alpha alpha'):
+            document.extracted_text = text
+            self.save_elsewhere(document)
+        utils_search.sync_index()
+
+        # Changes the index already holds are skipped when read again
+        utils_search._index_state = utils_search._index_state._replace(change_id=0)
+        utils_search.sync_index()
+
+        expected = utils_search.build_index_state().word_frequency
+        self.assertEqual(utils_search.current_index_state().word_frequency, expected)
+
+    def test_a_change_committed_out_of_order_is_read_later(self):
+        utils_search.ensure_index(wait=True)
+        document = self.create_document('G-7', text='unrelated ledger')
+        Document.objects.filter(pk=document.pk).update(
+            extracted_text='capybara ledger', search_terms={}, modified_at=timezone.now()
+        )
+
+        # A lower id is still committing while a higher one is read
+        pending = SearchIndexChange.objects.create(document_id=document.pk).pk
+        SearchIndexChange.objects.filter(pk=pending).delete()
+        later = SearchIndexChange.objects.create()
+        utils_search.sync_index()
+        self.assertEqual(utils_search.current_index_state().change_id, later.pk)
+        self.assertIn(pending, utils_search.current_index_state().change_gaps)
+        self.assertEqual(self.lexical_ids('capybara'), [])
+
+        SearchIndexChange.objects.create(pk=pending, document_id=document.pk)
+        utils_search.sync_index()
+        self.assertEqual(self.lexical_ids('capybara'), [document.pk])
+        self.assertNotIn(pending, utils_search.current_index_state().change_gaps)
+
+    def test_every_snapshot_gets_its_own_name(self):
+        self.create_document('G-8', text='aardvark inventory')
+        utils_search.ensure_index(wait=True)
+        utils_search.save_index_snapshot()
+        first = utils_search._loaded_snapshot
+        utils_search.save_index_snapshot()
+        self.assertNotEqual(utils_search._loaded_snapshot, first)
+
+
+class OcrJobTests(SearchTestCase):
+    def queued_document(self, number, text='quokka annual memo'):
+        document = self.create_document(number, text=None, content=docx_bytes(text), file_name='memo.docx')
+        return document, ocr_jobs.enqueue_document(document)
+
+    def test_a_job_is_claimed_once(self):
+        _, job = self.queued_document('J-1')
+        claimed = ocr_jobs.claim_job('worker-a')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(ocr_jobs.claim_job('worker-b'))
+
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), (OcrJob.RUNNING, 'worker-a', 1))
+
+    def test_workers_claim_different_jobs(self):
+        self.queued_document('J-2')
+        self.queued_document('J-3')
+        first, second = ocr_jobs.claim_job('worker-a'), ocr_jobs.claim_job('worker-b')
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertIsNone(ocr_jobs.claim_job('worker-c'))
+
+    def test_failures_back_off_then_give_up(self):
+        document, job = self.queued_document('J-4')
+        for attempt, delay in ((1, ocr_jobs.RETRY_DELAY), (2, ocr_jobs.RETRY_DELAY * 2)):
+            claimed = ocr_jobs.claim_job('worker-a')
+            before = timezone.now()
+            ocr_jobs.fail_job(claimed, 'tesseract crashed')
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (OcrJob.QUEUED, attempt))
+            self.assertAlmostEqual((job.run_after - before).total_seconds(), delay, delta=5)
+            # Not due yet
+            self.assertIsNone(ocr_jobs.claim_job('worker-a'))
+            OcrJob.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+        ocr_jobs.fail_job(ocr_jobs.claim_job('worker-a'), 'tesseract crashed')
+        job.refresh_from_db()
+        document.refresh_from_db()
+        self.assertEqual(job.status, OcrJob.FAILED)
+        self.assertEqual(document.processing_status, Document.FAILED)
+
+    def test_stale_jobs_are_requeued(self):
+        _, job = self.queued_document('J-5')
+        ocr_jobs.claim_job('worker-a')
+        OcrJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=ocr_jobs.JOB_TIMEOUT + 1))
+        self.assertEqual(ocr_jobs.requeue_stale_jobs(), (1, 0))
+        self.assertEqual(ocr_jobs.claim_job('worker-b').pk, job.pk)
+
+    def test_extracted_text_reaches_web_workers(self):
+        self.create_document('J-6', text='unrelated ledger')
+        document, _ = self.queued_document('J-7', text='quokka annual memo')
+        utils_search.ensure_index(wait=True)
+
+        # The worker is another process (or container), so its commit is not seen here
+        job = ocr_jobs.claim_job('worker-a')
+        with self.captureOnCommitCallbacks(execute=False):
+            self.assertTrue(ocr_jobs.run_job(job))
+        document.refresh_from_db()
+        self.assertEqual(document.processing_status, Document.READY)
+
+        # The web worker picks the text up from the change log, without a shared snapshot
+        shutil.rmtree(utils_search.INDEX_DIR)
+        utils_search._last_sync_request = 0.0
+        self.assertEqual(self.lexical_ids('quokka'), [document.pk])
+        self.assertEqual(ocr_jobs.job_status(document)['job']['status'], OcrJob.DONE)
+
+
+class OcrEngineTests(TestCase):
+    def test_auto_falls_back_to_pytesseract_without_the_bindings(self):
+        with mock.patch.object(utils_ocr, 'OCR_ENGINE', 'auto'), \
+                mock.patch.object(utils_ocr, '_ocr_engine', None), \
+                mock.patch.object(utils_ocr, 'TesserocrEngine', side_effect=ImportError('No module named tesserocr')):
+            self.assertIsInstance(utils_ocr.get_ocr_engine(), utils_ocr.PytesseractEngine)
+
+    def test_ocr_version_loads_no_engine(self):
+        with mock.patch.object(utils_ocr, 'OCR_ENGINE', 'pytesseract'), \
+                mock.patch.object(utils_ocr, '_ocr_engine', None), \
+                mock.patch.object(utils_ocr, '_ocr_version', None), \
+                mock.patch.object(utils_ocr, 'load_ocr_engine', side_effect=AssertionError):
+            self.assertIn(':pytesseract-', utils_ocr.ocr_version())
+            self.assertIsNone(utils_ocr._ocr_engine)
+
+    def test_ocr_version_follows_a_fallback_engine(self):
+        with mock.patch.object(utils_ocr, 'OCR_ENGINE', 'tesserocr'), \
+                mock.patch.object(utils_ocr, '_ocr_engine', None), \
+                mock.patch.object(utils_ocr, '_ocr_version', None), \
+                mock.patch.object(utils_ocr.TesserocrEngine, 'version', return_value='5.3.0'), \
+                mock.patch.object(utils_ocr.TesserocrEngine, '_api', side_effect=RuntimeError('Failed to init API')), \
+                mock.patch('builtins.print'):
+            self.assertIn(':tesserocr-5.3.0:', utils_ocr.ocr_version())
+            self.assertIsInstance(utils_ocr.get_ocr_engine(), utils_ocr.PytesseractEngine)
+            self.assertIn(':pytesseract-', utils_ocr.ocr_version())
+
+
+@skipUnless(connection.vendor == 'postgresql', "needs DATABASE_URL to point at a PostgreSQL server")
+class PostgresSearchBackendTests(SearchTestCase):
+    def search_ids(self, query, filters=None):
+        queryset = PostgresSearchBackend().filter_queryset(Document.objects.all(), query, filters)
+        return list(queryset.values_list('id', flat=True))
+
+    def test_full_text_and_trigram_matches_are_ranked(self):
+        in_title = self.create_document('P-1', title='budget review', text='budget figures')
+        in_text = self.create_document('P-2', title='minutes', text='the budget was discussed')
+        misspelt = self.create_document('P-3', title='budgte')
+        self.create_document('P-4', title='minutes', text='unrelated')
+
+        ids = self.search_ids('budget')
+        self.assertEqual(set(ids), {in_title.pk, in_text.pk, misspelt.pk})
+        self.assertLess(ids.index(in_title.pk), ids.index(in_text.pk))
+        self.assertEqual(self.search_ids('INV-2024-017'), [])
+
+        numbered = self.create_document('INV-2024-0117')
+        self.assertEqual(self.search_ids('INV-2024-017'), [numbered.pk])
+
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW pg_trgm.similarity_threshold")
+            self.assertEqual(float(cursor.fetchone()[0]), PostgresSearchBackend.trigram_threshold)
+
+    def test_rows_are_selected_with_index_operators(self):
+        queryset = PostgresSearchBackend().filter_queryset(Document.objects.all(), 'budget')
+        where = str(queryset.query).split(' WHERE ', 1)[1].split(' ORDER BY ', 1)[0]
+        self.assertIn('@@', where)
+        self.assertIn('%', where)
+        self.assertNotIn('SIMILARITY', where.upper())
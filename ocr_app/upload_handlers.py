@@ -0,0 +1,44 @@
+"""Upload handlers that hash files while they are received.
+
+The SHA-256 of each uploaded file is left on ``UploadedFile.sha256`` so
+uploads can be matched against stored documents and cached OCR text
+without reading the file a second time.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+def file_sha256(f):
+    """SHA-256 hex digest of a file, computed from its chunks"""
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingUploadHandlerMixin:
+    def new_file(self, *args, **kwargs):
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # Only the handler that keeps the chunk (returns None) hashes it
+        remaining = super().receive_data_chunk(raw_data, start)
+        if remaining is None:
+            self.digest.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
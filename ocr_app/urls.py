@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import  SearchDocumentView
+from .views import  SearchDocumentView, SearchCacheStatsView, AutocompleteView
 
 urlpatterns = [
     
     path('search_with_ai/', SearchDocumentView.as_view(), name='search_document'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('search_cache_stats/', SearchCacheStatsView.as_view(), name='search_cache_stats'),
 ]
\ No newline at end of file
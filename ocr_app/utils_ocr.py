@@ -1,58 +1,361 @@
-import pytesseract
-import cv2
+import importlib.util
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 import numpy as np
-from PIL import Image
-from docx import Document as DocxDocument
-import fitz  # PyMuPDF
-import re
-from urllib.parse import unquote
 from io import BytesIO
 from typing import Union, BinaryIO
+from django.conf import settings
+from .lazy import lazy_module
+# Shared with search so OCR output and queries normalize identically
+from .normalization import advanced_normalize_text  # noqa: F401
+
+# OpenCV, Tesseract, PyMuPDF and python-docx load on first OCR call
+cv2 = lazy_module('cv2')
+pytesseract = lazy_module('pytesseract')
+tesserocr = lazy_module('tesserocr')
+fitz = lazy_module('fitz')  # PyMuPDF
+docx = lazy_module('docx')
+PILImage = lazy_module('PIL.Image')  # header reads only
+
+# Images are OCRed in passes of bounded size: a fast pass at about A4 150 dpi,
+# then one at about A4 300 dpi only if Tesseract's mean word confidence is low
+FAST_PASS_PIXELS = getattr(settings, 'OCR_FAST_PASS_PIXELS', 1240 * 1754)
+FULL_PASS_PIXELS = getattr(settings, 'OCR_FULL_PASS_PIXELS', 2480 * 3508)
+MIN_CONFIDENCE = getattr(settings, 'OCR_MIN_CONFIDENCE', 70)
+# Image buffers one image or page may hold at once (see MemoryMeter)
+OCR_MEMORY_LIMIT = getattr(settings, 'OCR_MEMORY_LIMIT', 256 * 1024 * 1024)
+
+# Scanned PDF pages are rendered at this resolution for OCR
+PDF_OCR_DPI = getattr(settings, 'OCR_PDF_DPI', 300)
+# Embedded page scans below this resolution are re-rendered at PDF_OCR_DPI instead
+MIN_EMBEDDED_IMAGE_DPI = 200
+# A text layer with fewer non-space characters counts as missing
+MIN_PAGE_CHARS = 25
+# Pages mostly covered by images get OCR unless their text layer is this dense
+IMAGE_PAGE_COVERAGE = 0.5
+DENSE_PAGE_CHARS = 200
+# Processes OCRing scanned pages; shared by every PDF being extracted
+PDF_OCR_PROCESSES = getattr(settings, 'OCR_PDF_PROCESSES', min(4, os.cpu_count() or 1))
+
+# "tesserocr" keeps Tesseract loaded in-process (needs the tesserocr bindings),
+# "pytesseract" runs the tesseract binary per image, "auto" prefers tesserocr
+OCR_ENGINES = ('tesserocr', 'pytesseract')
+OCR_ENGINE = getattr(settings, 'OCR_ENGINE', 'auto')
+TESSERACT_LANG = "ara+eng"
+TESSERACT_CONFIG = r"-l ara+eng --psm 6 -c preserve_interword_spaces=1"
+# Bump when preprocessing or page handling changes what extraction returns;
+# cached OCR text is keyed by it (see ocr_version)
+OCR_PIPELINE_VERSION = 2
 
 # ---------------------------------------------------------------------------
-# Helper: accept either path str or file-like object and return PIL Image
+# Helper: accept either path str or file-like object and return its bytes
 # ---------------------------------------------------------------------------
 
-def _load_image(img_source: Union[str, BinaryIO]):
-    """Return cv2 image from a file path or a binary stream."""
-    try:
-        if isinstance(img_source, str):
-            img = cv2.imread(img_source)
-        else:
-            # Stream → bytes → numpy array → cv2 image
-            img_bytes = img_source.read()
-            np_arr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        return img
-    except Exception:
-        return None
+def _read_bytes(source: Union[str, BinaryIO]):
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return source.read()
+
+# ---------------------------------------------------------------------------
+# Memory accounting
+# ---------------------------------------------------------------------------
+
+class MemoryMeter:
+    """Image buffers held by one OCR call and their peak, in bytes.
+
+    Passes are sized so the peak stays under OCR_MEMORY_LIMIT; Tesseract's
+    own copy of the image is not counted.
+    """
+
+    def __init__(self):
+        self.held = {}
+        self.peak = 0
+
+    def hold(self, array):
+        self.held[id(array)] = array.nbytes
+        self.peak = max(self.peak, sum(self.held.values()))
+        return array
+
+    def release(self, array):
+        self.held.pop(id(array), None)
+
+
+# A pass holds its grayscale image and two working copies, 1 byte per pixel
+_PASS_BUFFERS = 3
 
 # ---------------------------------------------------------------------------
 # OCR FOR IMAGES (Arabic + English)
 # ---------------------------------------------------------------------------
 
-def extract_text_from_image(image_source: Union[str, BinaryIO]):
-    """Enhanced OCR for Arabic/English images. Accepts path or stream."""
+def _preprocess(gray, meter, block=41):
+    """Contrast-equalized, binarized page for Tesseract, from a grayscale image."""
+    # CLAHE on the gray image replaces equalizing LAB lightness in three color copies
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    equalized = meter.hold(clahe.apply(gray))
+    thresh = meter.hold(cv2.adaptiveThreshold(equalized, 255,
+                                              cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                              cv2.THRESH_BINARY, block, 2))
+    meter.release(equalized)
+    return thresh
+
+
+def _scaled(gray, scale):
+    if scale >= 1:
+        return gray
+    height, width = gray.shape
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+# ---------------------------------------------------------------------------
+# OCR engines
+# ---------------------------------------------------------------------------
+
+class PytesseractEngine:
+    """Runs the tesseract binary per image: temp file, process start, model load."""
+
+    name = "pytesseract"
+
+    @staticmethod
+    def version():
+        return str(pytesseract.get_tesseract_version())
+
+    def recognize(self, img):
+        return pytesseract.image_to_string(img, config=TESSERACT_CONFIG)
+
+    def recognize_with_confidence(self, img):
+        """Text and mean word confidence (0-100) from a single tesseract run."""
+        data = pytesseract.image_to_data(img, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+            if float(data["conf"][i]) >= 0:
+                confidences.append(float(data["conf"][i]))
+        text = "\n".join(" ".join(words) for words in lines.values())
+        return text, sum(confidences) / len(confidences) if confidences else 0.0
+
+
+class TesserocrEngine:
+    """Tesseract through its C API with one initialized handle per thread.
+
+    The ara+eng models load once per handle and images are handed over as
+    raw 8-bit buffers, with no temp files or subprocesses.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        self._local = threading.local()
+        # Fail here, not on the first page, when the bindings or models are missing
+        self._api()
+
+    @staticmethod
+    def version():
+        # "tesseract 5.3.0\n leptonica-1.82.0 ..."; no models are loaded
+        return tesserocr.tesseract_version().split()[1]
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=TESSERACT_LANG, psm=tesserocr.PSM.SINGLE_BLOCK)
+            api.SetVariable("preserve_interword_spaces", "1")
+            self._local.api = api
+        return api
+
+    def recognize(self, img):
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        height, width = img.shape[:2]
+        channels = 1 if img.ndim == 2 else img.shape[2]
+        if channels == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        api = self._api()
+        api.SetImageBytes(img.tobytes(), width, height, channels, width * channels)
+        return api.GetUTF8Text()
+
+    def recognize_with_confidence(self, img):
+        text = self.recognize(img)
+        return text, float(self._api().MeanTextConf())
+
+
+def load_ocr_engine(name=None):
+    """Build the OCR engine ``name`` (uncached); raises if it cannot load."""
+    name = name or OCR_ENGINE
+    if name == "auto":
+        name = OCR_ENGINES[0]
+    if name == "tesserocr":
+        return TesserocrEngine()
+    if name == "pytesseract":
+        return PytesseractEngine()
+    raise ValueError(f"Unknown OCR engine {name!r}")
+
+
+_ocr_engine = None
+_ocr_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """The configured engine, loaded once per process; pytesseract if it cannot load."""
+    global _ocr_engine, _ocr_version
+    if _ocr_engine is None:
+        with _ocr_engine_lock:
+            if _ocr_engine is None:
+                try:
+                    _ocr_engine = load_ocr_engine()
+                except Exception as e:
+                    # "auto" without the bindings installed is the expected fallback
+                    if not (OCR_ENGINE == "auto" and isinstance(e, ImportError)):
+                        print(f"OCR engine {OCR_ENGINE} unavailable, using pytesseract: {e}")
+                    _ocr_engine = PytesseractEngine()
+                # Taken from the configured engine until now, which may have failed to load
+                _ocr_version = None
+    return _ocr_engine
+
+
+_ocr_version = None
+
+
+def _configured_engine():
+    """Engine class ``get_ocr_engine`` will load, judged without loading it."""
+    name = OCR_ENGINE
+    if name == "auto":
+        name = "tesserocr" if importlib.util.find_spec("tesserocr") else "pytesseract"
+    return TesserocrEngine if name == "tesserocr" else PytesseractEngine
+
+
+def ocr_version():
+    """Pipeline, engine and Tesseract release that extracted text comes from.
+
+    Engines can use different binaries and tessdata, so this names the
+    engine in use, or the configured one before any is loaded. Web workers
+    call it to look up cached text, so it never loads an engine's models.
+    """
+    global _ocr_version
+    if _ocr_version is None:
+        engine = _ocr_engine or _configured_engine()
+        try:
+            release = engine.version()
+        except Exception:
+            release = "unknown"
+        _ocr_version = f"{OCR_PIPELINE_VERSION}:{engine.name}-{release}:{PDF_OCR_DPI}dpi"
+    return _ocr_version
+
+
+def _pass_scales(pixels):
+    """Downscale factors of the fast and full passes over a source of ``pixels``."""
+    # Half the limit is left for the source image
+    budget = OCR_MEMORY_LIMIT // (2 * _PASS_BUFFERS)
+    scales = []
+    for target in (FAST_PASS_PIXELS, FULL_PASS_PIXELS):
+        scale = min(1.0, math.sqrt(min(target, budget) / max(pixels, 1)))
+        if not scales or scale > scales[-1]:
+            scales.append(scale)
+    return scales
+
+
+def _ocr_passes(render, pixels, meter, report):
+    """OCR ``render(scale)`` from the fast pass up, stopping once confidence is high enough."""
+    engine = get_ocr_engine()
+    scales = _pass_scales(pixels)
+    passes = report.setdefault("passes", [])
+    best_text, best_confidence = "", -1.0
+    for scale in scales:
+        start = time.perf_counter()
+        img = meter.hold(render(scale))
+        # The threshold window (41 px at full size) covers the same area in every pass
+        block = max(11, int(41 * scale / scales[-1]) | 1)
+        binary = _preprocess(img, meter, block)
+        meter.release(img)
+        text, confidence = engine.recognize_with_confidence(binary)
+        meter.release(binary)
+        passes.append({
+            "width": binary.shape[1],
+            "height": binary.shape[0],
+            "confidence": round(confidence, 1),
+            "ms": round((time.perf_counter() - start) * 1000),
+        })
+        del img, binary
+        if confidence > best_confidence:
+            best_text, best_confidence = text, confidence
+        if confidence >= MIN_CONFIDENCE:
+            break
+    report["peak_bytes"] = max(report.get("peak_bytes", 0), meter.peak)
+    return best_text
+
+
+_REDUCED_GRAYSCALE = {
+    1: "IMREAD_GRAYSCALE",
+    2: "IMREAD_REDUCED_GRAYSCALE_2",
+    4: "IMREAD_REDUCED_GRAYSCALE_4",
+    8: "IMREAD_REDUCED_GRAYSCALE_8",
+}
+
+
+def _image_size(data):
+    """Width and height from the image header without decoding; (0, 0) if unknown."""
     try:
-        img = _load_image(image_source)
-        if img is None:
-            return ""
-
-        # --- Pre‑processing (lab, clahe, thresh) ---
-        lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        cl = clahe.apply(l)
-        limg = cv2.merge((cl, a, b))
-        enhanced = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
-        gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
-        thresh = cv2.adaptiveThreshold(gray, 255,
-                                       cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                       cv2.THRESH_BINARY, 41, 2)
-        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((1, 1), np.uint8))
-
-        custom = r"-l ara+eng --psm 6 -c preserve_interword_spaces=1"
-        return pytesseract.image_to_string(cleaned, config=custom)
+        return PILImage.open(BytesIO(data)).size
+    except Exception:
+        return 0, 0
+
+
+def _decode_reduction(width, height):
+    """Decode reduction that keeps the full pass sharp and the source within the memory limit."""
+    pixels = width * height
+    reduction = 1
+    for factor in (2, 4, 8):
+        if pixels / factor ** 2 >= FULL_PASS_PIXELS or pixels / reduction ** 2 > OCR_MEMORY_LIMIT / 2:
+            reduction = factor
+    return reduction
+
+
+def ocr_encoded_image(data, report=None):
+    """OCR an encoded image (JPEG, PNG, TIFF...) in grayscale within OCR_MEMORY_LIMIT.
+
+    Large sources are decoded reduced (JPEG scales while decoding). Returns
+    None when OpenCV cannot decode the image.
+    """
+    report = {} if report is None else report
+    meter = MemoryMeter()
+    width, height = _image_size(data)
+    reduction = _decode_reduction(width, height)
+    encoded = meter.hold(np.frombuffer(data, np.uint8))
+    gray = cv2.imdecode(encoded, getattr(cv2, _REDUCED_GRAYSCALE[reduction]))
+    if gray is None:
+        return None
+    meter.hold(gray)
+    report.update(source_width=width or gray.shape[1], source_height=height or gray.shape[0], reduction=reduction)
+    return _ocr_passes(lambda scale: _scaled(gray, scale), gray.size, meter, report)
+
+
+def _add_page_reports(report, page_reports):
+    if report is None:
+        return
+    report.setdefault("pages", []).extend(page_reports)
+    report["peak_bytes"] = max([report.get("peak_bytes", 0)] + [r.get("peak_bytes", 0) for r in page_reports])
+
+
+def extract_text_from_image(image_source: Union[str, BinaryIO], report=None):
+    """Enhanced OCR for Arabic/English images. Accepts path or stream.
+
+    ``report``, if given, receives each pass's size and confidence and the
+    peak image memory.
+    """
+    try:
+        page_report = {}
+        text = ocr_encoded_image(_read_bytes(image_source), page_report)
+        _add_page_reports(report, [page_report])
+        return text or ""
     except Exception as e:
         print(f"OCR Image Error: {e}")
         return ""
@@ -69,13 +372,153 @@ def _open_pdf(pdf_source: Union[str, BinaryIO]):
     return fitz.open(stream=pdf_source.read(), filetype="pdf")
 
 
-def extract_text_from_pdf(pdf_source: Union[str, BinaryIO]):
-    """Extract text from PDF preserving ligatures (Arabic)."""
+def _page_needs_ocr(page, text):
+    """True for scanned pages: no usable text layer, or a thin one over a page image."""
+    chars = len("".join(text.split()))
+    if chars < MIN_PAGE_CHARS:
+        return True
+    if chars >= DENSE_PAGE_CHARS:
+        return False
+    page_area = abs(page.rect) or 1
+    image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return image_area / page_area >= IMAGE_PAGE_COVERAGE
+
+
+def _embedded_scan(pdf, page):
+    """The page's full-page scan as stored (encoded), or None if it must be rendered."""
+    if page.rotation:
+        return None
+    page_area = abs(page.rect) or 1
+    for info in page.get_image_info(xrefs=True):
+        if not info.get("xref") or abs(fitz.Rect(info["bbox"]) & page.rect) < 0.9 * page_area:
+            continue
+        if info["width"] * 72 / page.rect.width < MIN_EMBEDDED_IMAGE_DPI:
+            return None
+        return pdf.extract_image(info["xref"])["image"]
+    return None
+
+
+def _render_page(page, zoom):
+    """The page in grayscale at ``zoom`` times 72 dpi."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width)
+
+
+def ocr_pdf_page(pdf_path, page_number, dpi=PDF_OCR_DPI):
+    """OCR one page, using its embedded scan when possible. Runs in the page pool.
+
+    Returns the text and the page's OCR report.
+    """
+    report = {"page": page_number + 1}
+    try:
+        with fitz.open(pdf_path) as pdf:
+            page = pdf[page_number]
+            scan = _embedded_scan(pdf, page)
+            # Formats OpenCV cannot decode (JBIG2, CCITT, JPX) are rendered instead
+            text = ocr_encoded_image(scan, report) if scan is not None else None
+            if text is None:
+                # Passes render directly at their own resolution
+                zoom = dpi / 72
+                pixels = abs(page.rect) * zoom * zoom
+                text = _ocr_passes(lambda scale: _render_page(page, zoom * scale), pixels, MemoryMeter(), report)
+            return text, report
+    except Exception as e:
+        print(f"PDF OCR Error (page {page_number + 1}): {e}")
+        return "", report
+
+
+def _init_page_worker():
+    # Tesseract's own threads would oversubscribe the CPUs the pool already uses
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    # Load the models once per pool process, before its first page
+    get_ocr_engine()
+
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # Spawned, not forked: callers (web and OCR workers) run threads
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PDF_OCR_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_page_worker,
+            )
+        return _page_pool
+
+
+def _discard_page_pool(pool):
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@contextmanager
+def _pdf_path(pdf_source: Union[str, BinaryIO]):
+    """A file path pool processes can open; streams are spooled to a temp file."""
+    if isinstance(pdf_source, str):
+        yield pdf_source
+        return
+    pdf_source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        f.write(pdf_source.read())
+        f.flush()
+        yield f.name
+
+
+def _ocr_pdf_pages(pdf_source, page_numbers, progress=None):
+    """``{page_number: (text, report)}`` for the given pages, OCRed across the page pool."""
+    texts = {}
+    with _pdf_path(pdf_source) as path:
+        if len(page_numbers) == 1 or PDF_OCR_PROCESSES <= 1:
+            for number in page_numbers:
+                texts[number] = ocr_pdf_page(path, number)
+                if progress:
+                    progress(len(texts), len(page_numbers))
+            return texts
+
+        pool = _get_page_pool()
+        try:
+            futures = {pool.submit(ocr_pdf_page, path, number): number for number in page_numbers}
+            for future in as_completed(futures):
+                texts[futures[future]] = future.result()
+                if progress:
+                    progress(len(texts), len(page_numbers))
+        except BrokenProcessPool as e:
+            print(f"PDF OCR pool failed, continuing in-process: {e}")
+            _discard_page_pool(pool)
+            for number in page_numbers:
+                if number not in texts:
+                    texts[number] = ocr_pdf_page(path, number)
+    return texts
+
+
+def extract_text_from_pdf(pdf_source: Union[str, BinaryIO], progress=None, report=None):
+    """Extract text from PDF preserving ligatures (Arabic).
+
+    Pages without a usable text layer are OCRed in parallel; ``progress`` is
+    called with ``(pages_done, pages_total)`` as they finish and ``report``
+    receives the OCRed pages' reports.
+    """
     try:
         doc = _open_pdf(pdf_source)
         flags = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE
-        text = "\n".join(page.get_text("text", flags=flags) for page in doc)
-        return text
+        texts = [page.get_text("text", flags=flags) for page in doc]
+        scanned = [i for i, page in enumerate(doc) if _page_needs_ocr(page, texts[i])]
+        if scanned:
+            pages = _ocr_pdf_pages(pdf_source, scanned, progress)
+            for number in sorted(pages):
+                text = pages[number][0]
+                if text.strip():
+                    texts[number] = text
+            _add_page_reports(report, [pages[number][1] for number in sorted(pages)])
+        return "\n".join(texts)
     except Exception as e:
         print(f"PDF Extraction Error: {e}")
         return ""
@@ -87,50 +530,28 @@ def extract_text_from_pdf(pdf_source: Union[str, BinaryIO]):
 def extract_text_from_word(word_source: Union[str, BinaryIO]):
     try:
         if isinstance(word_source, str):
-            doc = DocxDocument(word_source)
+            doc = docx.Document(word_source)
         else:
             word_source.seek(0)
-            doc = DocxDocument(BytesIO(word_source.read()))
+            doc = docx.Document(BytesIO(word_source.read()))
         return "\n".join(para.text for para in doc.paragraphs)
     except Exception as e:
         print(f"Word Extraction Error: {e}")
         return ""
 
 # ---------------------------------------------------------------------------
-# ADVANCED NORMALIZATION FUNCTION – unchanged but wrapped in function
+# Dispatch by file name
 # ---------------------------------------------------------------------------
 
-def advanced_normalize_text(text: str):
-    """Arabic text normalization with special character preservation."""
-    if not text:
-        return ""
-
-    for _ in range(3):
-        try:
-            if '%' in text:
-                decoded = unquote(text)
-                if decoded != text:
-                    text = decoded
-                else:
-                    break
-        except Exception:
-            break
+def extract_text(file_name: str, source: Union[str, BinaryIO], progress=None, report=None):
+    """Text of an uploaded file, picking the extractor from its extension.
 
-    text = re.sub(r'[\u064B-\u0652\u0670\u0640\u06D6-\u06ED\u08F0-\u08FF]', '', text)
-
-    replacements = {
-        'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
-        'ة': 'ه', 'ت': 'ت',
-        'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و',
-        'ه': 'ه', 'ة': 'ه',
-        'ك': 'ك', 'ی': 'ي', 'ے': 'ي',
-        '\u200c': '', '\u200d': '', '\u200e': '', '\u200f': '',
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-
-    text = text.lower()
-    text = re.sub(r'[\|/\\]+', ' ', text)
-    text = re.sub(r'[^\w\s\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    ``progress(done, total)`` reports OCRed pages of scanned PDFs; ``report``
+    collects per-page OCR passes and peak image memory.
+    """
+    name = file_name.lower()
+    if name.endswith('.pdf'):
+        return extract_text_from_pdf(source, progress, report)
+    if name.endswith(('.doc', '.docx')):
+        return extract_text_from_word(source)
+    return extract_text_from_image(source, report)
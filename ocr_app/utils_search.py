@@ -1,27 +1,166 @@
 import re
 import os
-import faiss
+import json
+import calendar
+import shutil
+import time
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from sentence_transformers import SentenceTransformer
 from archievesystem.models import Document
+from .models import DocumentEmbedding, SearchIndexChange
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
 from urllib.parse import unquote, quote
 from django.core.files.storage import default_storage
-from collections import Counter
+from collections import Counter, OrderedDict
+from typing import NamedTuple
 from rapidfuzz import process, fuzz
 import numpy as np
+from .lazy import lazy_module, record_load
+from .inverted_index import InvertedIndex
+from .prefix_index import PrefixIndex
+from .document_attributes import FILTER_FIELDS, DocumentAttributes
+from .normalization import NORMALIZATION_VERSION, advanced_normalize_text, normalize_many
+from .embedding_service import EmbeddingClient, EmbeddingServiceUnavailable
+
+# Heavy dependencies are only imported on first real use
+faiss = lazy_module('faiss')
 
 # Use multilingual model that supports Arabic and English well
-sbert_model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+SBERT_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+_sbert_model = None
+_sbert_lock = threading.Lock()
+
+# Encoder runtime: "torch" (fp32), "int8" (dynamic quantization) or "onnx"
+ENCODER_BACKENDS = ('torch', 'int8', 'onnx')
+ENCODER_BACKEND = getattr(settings, 'SEARCH_ENCODER_BACKEND', 'torch')
+ONNX_MODEL_FILE = getattr(settings, 'SEARCH_ONNX_MODEL_FILE', None)
+
+# Vectors from different runtimes are close but not identical, so stored
+# embeddings and snapshots are keyed by model and runtime
+EMBEDDING_MODEL_NAME = (
+    SBERT_MODEL_NAME if ENCODER_BACKEND == 'torch'
+    else f"{SBERT_MODEL_NAME}#{ENCODER_BACKEND}"
+)
+
+# Web workers reach a shared run_embedding_service process through this
+# client when a socket is configured, and encode in-process otherwise
+EMBEDDING_SOCKET = getattr(settings, 'SEARCH_EMBEDDING_SOCKET', None)
+_embedding_client = EmbeddingClient(EMBEDDING_SOCKET, EMBEDDING_MODEL_NAME) if EMBEDDING_SOCKET else None
+_encode_batcher = None  # Set inside the service, which batches its own encodes
+
+# On-disk index snapshots (bump the version when the snapshot layout changes)
+INDEX_FORMAT_VERSION = 6
+INDEX_DIR = str(getattr(settings, 'SEARCH_INDEX_DIR', os.path.join(settings.BASE_DIR, 'search_index')))
+
+class IndexState(NamedTuple):
+    """One consistent set of search indexes.
+
+    A published state is never mutated: builds and updates prepare a new
+    one and swap it in with ``publish_index_state``, so readers take
+    ``current_index_state()`` once per call and never see torn indexes.
+    """
+    index: object = None  # FAISS passage index
+    documents_db: frozenset = frozenset()  # Document ids present in the index
+    word_frequency: Counter = Counter()
+    lexical_index: InvertedIndex = None  # Over filename, title, notes, number and text
+    attributes: DocumentAttributes = None  # Filterable metadata and passage counts
+    completions: PrefixIndex = None  # Autocomplete over word_frequency, built before publishing
+    read_only: bool = False  # index is memory-mapped from a snapshot
+    generation: int = 0  # Bumped on every publish
+    change_id: int = 0  # Last SearchIndexChange applied
+    change_gaps: dict = {}  # Lower change ids not committed yet -> first seen (epoch); replaced, never mutated
+
+_index_state = IndexState()
+
+# Builds, snapshot loads and incremental updates are serialized by this lock;
+# request threads only ever try it without blocking
+_writer_lock = threading.RLock()
+
+# Writer-private copy that queued incremental updates are applied to
+_working_state = None
+_working_updates = 0
+PUBLISH_EVERY = 50  # updates applied before a busy queue publishes anyway
+
+# Document fields the search indexes are built from
+INDEXED_FIELDS = (
+    'file', 'extracted_text', 'title', 'notes', 'document_number',
+    'search_title', 'search_filename', 'search_text', 'search_terms', 'file_extension',
+)
 
-# Optimized globals
-index = None
-documents_db = []
-word_frequency = Counter()
+# Change log catch-ups and background rebuilds run on one thread
+_update_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-index')
+_pending_lock = threading.Lock()
+_sync_pending = False
+_rebuild_future = None
+_last_rebuild = 0.0
+REBUILD_RETRY_INTERVAL = 60  # seconds between builds that left the index empty
 
-# Smaller cache for speed
-embedding_cache = {}
+# Every process applies the SearchIndexChange rows it has not seen yet
+_last_sync = 0.0
+_last_sync_request = 0.0
+SYNC_INTERVAL = 5  # seconds between catch-ups requested by searches
+SYNC_BATCH = 500  # change rows read per query
+GAP_TIMEOUT = 600  # seconds a missing lower change id is awaited before it counts as rolled back
+MAX_CHANGE_GAPS = 1000
+CHANGE_RETENTION = 7 * 24 * 3600  # seconds; older rows are pruned, and a process idle longer reloads
+
+# Snapshots only speed up process start; names carry their change id and a unique publish id
+_loaded_snapshot = None
+SNAPSHOT_INTERVAL = 60  # seconds between snapshots written after catch-ups
+
+# Query embeddings, least recently used dropped first
+embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+# Index type and search parameters chosen by the tune_search_index command
+INDEX_TUNING_FILE = os.path.join(INDEX_DIR, 'tuning.json')
+DEFAULT_SEARCH_PARAMS = {'nprobe': 6, 'efSearch': 64, 'quantizer_efSearch': 64}
+_index_tuning = {}
+_index_tuning_mtime = None
+_search_params_mtime = None
 CACHE_SIZE = 300
 
+def load_encoder(backend=None):
+    """Build a sentence encoder for ``backend`` (uncached).
+
+    ``torch`` is the full-precision model, ``int8`` the same model with its
+    Linear layers dynamically quantized, and ``onnx`` an ONNX Runtime export
+    (needs ``optimum[onnxruntime]``).
+    """
+    backend = backend or ENCODER_BACKEND
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}")
+
+    start = time.perf_counter()
+    from sentence_transformers import SentenceTransformer
+    record_load("import sentence_transformers", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if backend == 'onnx':
+        model_kwargs = {'file_name': ONNX_MODEL_FILE} if ONNX_MODEL_FILE else None
+        model = SentenceTransformer(SBERT_MODEL_NAME, backend='onnx', model_kwargs=model_kwargs)
+    else:
+        model = SentenceTransformer(SBERT_MODEL_NAME, device='cpu')
+        if backend == 'int8':
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    record_load(f"load sentence encoder ({backend})", time.perf_counter() - start)
+    return model
+
+def get_sbert_model():
+    """Load the sentence encoder on first use"""
+    global _sbert_model
+    if _sbert_model is None:
+        with _sbert_lock:
+            if _sbert_model is None:
+                _sbert_model = load_encoder()
+    return _sbert_model
+
 def get_original_filename(stored_name):
     """Extract original filename without timestamp or extension"""
     # Remove storage path if present
@@ -123,52 +262,6 @@ def build_document_dict(doc, score=None, name=None, direct_media_url=None):
         "direct_media_url": direct_media_url
     }
 
-def advanced_normalize_text(text):
-    """Arabic text normalization with special character preservation"""
-    if not text:
-        return ""
-    
-    # Multiple URL decoding attempts
-    for _ in range(3):
-        try:
-            if '%' in text:
-                decoded = unquote(text)
-                if decoded != text:
-                    text = decoded
-                else:
-                    break
-        except:
-            break
-    
-    # Extended Arabic diacritics removal
-    text = re.sub(r'[\u064B-\u0652\u0670\u0640\u06D6-\u06ED\u08F0-\u08FF]', '', text)
-    
-    # Comprehensive Arabic letter normalizations
-    arabic_normalizations = {
-        'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
-        'ة': 'ه', 
-        'ى': 'ي', 'ئ': 'ý', 'ؤ': 'و',
-        'ك': 'ك', 'ی': 'ي', 'ے': 'ي',
-        '\u200c': '', '\u200d': '', '\u200e': '', '\u200f': '',
-    }
-    
-    for old_char, new_char in arabic_normalizations.items():
-        text = text.replace(old_char, new_char)
-    
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Preserve underscores and hyphens in Arabic phrases
-    text = re.sub(r'[\|/\\]+', ' ', text)
-    
-    # Remove extra punctuation but preserve Arabic-English-numbers
-    text = re.sub(r'[^\w\s\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]', ' ', text)
-    
-    # Normalize multiple spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
 def extract_arabic_variants(word):
     """Generate common Arabic spelling variants"""
     if not word or len(word) < 2:
@@ -298,117 +391,937 @@ def arabic_similarity_score(query_term, filename_term):
     
     return max_score
 
-def get_fast_index(embeddings):
-    """Create optimized FAISS index"""
-    n_docs, dim = embeddings.shape
-    
-    if n_docs < 500:
-        return faiss.IndexFlatL2(dim)
-    elif n_docs < 2000:
-        nlist = max(8, n_docs // 30)
-        quantizer = faiss.IndexFlatL2(dim)
-        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
-        index.train(embeddings)
-        return index
+def _variant_groups(terms):
+    """Flattened spelling variants of ``terms`` and the start offset of each term's group"""
+    variants = []
+    starts = []
+    for term in terms:
+        starts.append(len(variants))
+        variants.extend(extract_arabic_variants(term))
+    return variants, np.array(starts, dtype=np.intp)
+
+def _contains(partial, shorter_lengths, longer_lengths):
+    """Pairs where the row string occurs inside the column string.
+
+    A partial_ratio of 100 means the shorter string occurs in the longer one.
+    """
+    return (partial == 100) & (shorter_lengths[:, None] <= longer_lengths[None, :])
+
+def batch_similarity_scores(query_terms, candidate_terms):
+    """``arabic_similarity_score`` for every query/candidate pair as a matrix.
+
+    Variants are expanded once per term and compared in one multi-threaded
+    ``process.cdist`` call.
+    """
+    n_queries, n_candidates = len(query_terms), len(candidate_terms)
+    if not n_queries or not n_candidates:
+        return np.zeros((n_queries, n_candidates), dtype=np.float32)
+
+    queries = np.array(query_terms, dtype=object)
+    candidates = np.array(candidate_terms, dtype=object)
+    query_lengths = np.array([len(t) for t in query_terms])
+    candidate_lengths = np.array([len(t) for t in candidate_terms])
+    partial = process.cdist(query_terms, candidate_terms, scorer=fuzz.partial_ratio, workers=-1)
+    query_in_candidate = _contains(partial, query_lengths, candidate_lengths)
+    candidate_in_query = _contains(partial.T, candidate_lengths, query_lengths).T
+
+    # Best ratio over the variant cross product, reduced group by group
+    query_variants, query_starts = _variant_groups(query_terms)
+    candidate_variants, candidate_starts = _variant_groups(candidate_terms)
+    ratios = process.cdist(query_variants, candidate_variants, scorer=fuzz.ratio, workers=-1)
+    plain = ratios[query_starts][:, candidate_starts]
+    scores = np.maximum.reduceat(np.maximum.reduceat(ratios, query_starts, axis=0), candidate_starts, axis=1)
+
+    # Substring bonuses apply to Arabic pairs; Latin pairs keep the plain ratio
+    long_query = (query_lengths >= 3)[:, None]
+    scores = np.where(long_query & query_in_candidate, np.maximum(scores, 85), scores)
+    scores = np.where(long_query & candidate_in_query, np.maximum(scores, 80), scores)
+    query_arabic = np.array([bool(re.search(r'[\u0600-\u06FF]', t)) for t in query_terms])
+    candidate_arabic = np.array([bool(re.search(r'[\u0600-\u06FF]', t)) for t in candidate_terms])
+    scores = np.where(query_arabic[:, None] | candidate_arabic[None, :], scores, plain)
+
+    # Phrase rules, first matching variant wins as in arabic_similarity_score
+    phrase = np.array(['_' in t or '-' in t for t in query_terms])
+    if phrase.any():
+        for i in np.flatnonzero(phrase):
+            variants = extract_arabic_variants(query_terms[i])
+            variant_lengths = np.array([len(v) for v in variants])
+            variant_partial = process.cdist(variants, candidate_terms, scorer=fuzz.partial_ratio, workers=-1)
+            equal = np.array(variants, dtype=object)[:, None] == candidates[None, :]
+            codes = np.where(equal, 88, np.where(_contains(variant_partial, variant_lengths, candidate_lengths), 80, 0))
+            first = codes[np.argmax(codes > 0, axis=0), np.arange(n_candidates)]
+            row = np.where(first > 0, first, scores[i])
+            row = np.where(candidate_in_query[i], 85, row)
+            scores[i] = np.where(query_in_candidate[i], 90, row)
+
+    # Exact and separator-insensitive matches take precedence
+    dashed = np.array([t.replace('_', '-') for t in candidate_terms], dtype=object)
+    spaced = np.array([t.replace('_', ' ') for t in candidate_terms], dtype=object)
+    query_dashed = np.array([t.replace('_', '-') for t in query_terms], dtype=object)
+    query_spaced = np.array([t.replace('_', ' ') for t in query_terms], dtype=object)
+    scores = np.where(query_spaced[:, None] == spaced[None, :], 90, scores)
+    scores = np.where(query_dashed[:, None] == dashed[None, :], 95, scores)
+    scores = np.where(queries[:, None] == candidates[None, :], 100, scores)
+    return scores.astype(np.float32)
+
+LEXICAL_TERM_PATTERN = re.compile(r'[\w\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF_-]{2,}')
+ARABIC_ARTICLES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+
+def canonical_terms(term):
+    """Return a term and, if it has one, its form without the Arabic article"""
+    for article in ARABIC_ARTICLES:
+        if term.startswith(article) and len(term) - len(article) >= 2:
+            return [term, term[len(article):]]
+    return [term]
+
+def lexical_terms(text, normalized=False):
+    """Canonical index terms of a text, also splitting joined filename phrases"""
+    if not text:
+        return []
+
+    if not normalized:
+        text = advanced_normalize_text(text)
+
+    terms = []
+    for token in LEXICAL_TERM_PATTERN.findall(text):
+        terms.extend(canonical_terms(token))
+        if '_' in token or '-' in token:
+            for part in re.split(r'[_-]+', token):
+                if len(part) >= 2:
+                    terms.extend(canonical_terms(part))
+    return terms
+
+def compute_search_fields(file_name, title, extracted_text):
+    """Derive the Document search columns from its content"""
+    original_name = get_original_filename(file_name) if file_name else ''
+    stored_filename = os.path.basename(file_name).lower() if file_name else ''
+
+    search_filename, search_title, search_text = normalize_many([original_name, title, extracted_text])
+
+    language = ''
+    sample = f"{search_filename} {search_title} {search_text[:3000]}"
+    if re.search(r'[\u0600-\u06FF]', sample):
+        language = Document.ARABIC
+    elif sample.strip():
+        language = Document.ENGLISH
+
+    return {
+        'search_title': search_title[:255],
+        'search_filename': search_filename[:255],
+        'search_text': search_text,
+        'search_terms': {
+            'filename': enhanced_extract_search_terms(search_filename, 25),
+            'text': enhanced_extract_search_terms(search_text[:3000], 40),
+        },
+        'language': language,
+        'file_extension': stored_filename.rsplit('.', 1)[1][:10] if '.' in stored_filename else '',
+    }
+
+def document_search_fields(fields):
+    """Precomputed search columns of a document, computing them if never filled"""
+    if fields.get('search_terms') or not (fields.get('file') or fields.get('title') or fields.get('extracted_text')):
+        return fields
+    return {**fields, **compute_search_fields(fields.get('file'), fields.get('title'), fields.get('extracted_text'))}
+
+def document_lexical_fields(fields):
+    """Split a document's indexed fields into per-field terms and filename info"""
+    fields = document_search_fields(fields)
+    file_name = fields.get('file')
+    field_terms = {
+        'title': lexical_terms(fields.get('search_title'), normalized=True),
+        'notes': lexical_terms(fields.get('notes')),
+        'document_number': lexical_terms(fields.get('document_number')),
+        'text': lexical_terms(fields.get('search_text'), normalized=True),
+    }
+
+    if not file_name:
+        return field_terms, (None, '', '')
+
+    search_filename = fields.get('search_filename', '')
+    field_terms['filename'] = lexical_terms(search_filename, normalized=True)
+    return field_terms, (get_original_filename(file_name), fields.get('file_extension', ''), search_filename)
+
+# Passage windows over the normalized text (characters)
+PASSAGE_CHARS = 600
+PASSAGE_OVERLAP = 150
+PASSAGE_STRIDE = PASSAGE_CHARS - PASSAGE_OVERLAP
+
+# Vector ids pack (document id, passage number) so no separate map is needed
+PASSAGE_BITS = 16
+MAX_PASSAGES = (1 << PASSAGE_BITS) - 1
+
+# "max" ranks a document by its best passage, "sum" rewards many matching passages
+PASSAGE_AGGREGATION = getattr(settings, 'SEARCH_PASSAGE_AGGREGATION', 'max')
+
+# Documents per embedding batch and vectors sampled to train IVF/PQ indexes
+INDEX_BATCH_DOCUMENTS = 500
+TRAINING_SAMPLE = 50000
+
+def passage_id(doc_id, passage_no):
+    return (doc_id << PASSAGE_BITS) | passage_no
+
+def passage_document(vector_id):
+    """Document id a passage vector belongs to"""
+    return int(vector_id) >> PASSAGE_BITS
+
+def passage_offset(vector_id):
+    """Character offset of a passage in the document's normalized text"""
+    return (int(vector_id) & MAX_PASSAGES) * PASSAGE_STRIDE
+
+def _document_id_range(doc_id):
+    """Selector covering every passage vector of a document"""
+    return faiss.IDSelectorRange(passage_id(doc_id, 0), passage_id(doc_id + 1, 0))
+
+def split_passages(text):
+    """Overlapping PASSAGE_CHARS windows over a text"""
+    if not text:
+        return []
+    starts = range(0, max(len(text) - PASSAGE_OVERLAP, 1), PASSAGE_STRIDE)
+    return [text[start:start + PASSAGE_CHARS] for start in starts][:MAX_PASSAGES]
+
+def default_index_factory(n_vectors, dim):
+    """FAISS factory string used until ``tune_search_index`` has picked one"""
+    if n_vectors < 2000:
+        # Flat indexes only store positions, so map them to passage ids
+        return 'IDMap2,SQfp16'
+    elif n_vectors < 20000:
+        return f'IVF{max(8, min(256, n_vectors // 30))},SQfp16'
     else:
-        nlist = max(16, min(128, n_docs // 25))
-        m = 8
-        quantizer = faiss.IndexFlatL2(dim)
-        index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, 8)
-        index.train(embeddings)
-        return index
+        return f'IVF{max(16, min(4096, int(4 * np.sqrt(n_vectors))))},PQ8'
 
-def index_documents():
-    """Enhanced indexing with original filename preservation"""
-    global index, documents_db, word_frequency
-    
-    documents = Document.objects.all()
-    texts = []
-    doc_ids = []
-    all_terms = []
+def index_candidates(n_vectors, dim):
+    """Factory strings of the index types worth trying for this corpus size"""
+    # Keep about 40 training points per IVF centroid
+    nlist = max(8, min(4096, int(4 * np.sqrt(n_vectors)), n_vectors // 40))
+    m = 16 if dim % 16 == 0 else 8
+    # Every edit removes a document's passages, so plain HNSW graphs, which
+    # cannot delete, are left out; an HNSW coarse quantizer is fine
+    candidates = {'flat': 'IDMap2,SQfp16'}
+    if n_vectors >= 2000:
+        candidates['ivf'] = f'IVF{nlist},SQfp16'
+        candidates['ivf_hnsw'] = f'IVF{nlist}_HNSW32,SQfp16'
+    if n_vectors >= 10000:
+        # PQ codebooks need 256 centroids per sub-quantizer
+        candidates['ivfpq'] = f'IVF{nlist},PQ{m}'
+    return candidates
 
-    for doc in documents:
-        doc_content = ""
-        filename_terms = []
-        
-        # Process filename
-        if doc.file:
-            # Get original filename without timestamp/extension
-            original_name = get_original_filename(doc.file.name)
-            doc_content = original_name
-            
-            # Add filename terms with variants
-            filename_terms = enhanced_extract_search_terms(
-                advanced_normalize_text(original_name), 
-                25
-            )
-            all_terms.extend(filename_terms)
-            
-            # Boost Arabic terms
-            arabic_terms = [t for t in filename_terms if re.search(r'[\u0600-\u06FF]', t)]
-            all_terms.extend(arabic_terms * 3)
-        
-        # Process content
-        if doc.extracted_text:
-            # Take larger content sample for Arabic
-            text_sample = doc.extracted_text[:3000]
-            text_normalized = advanced_normalize_text(text_sample)
-            doc_content = f"{doc_content} {text_normalized}".strip()
-            
-            # Add text terms with variants
-            text_terms = enhanced_extract_search_terms(text_normalized, 40)
-            all_terms.extend(text_terms)
-            
-            # Boost Arabic content terms
-            arabic_terms = [t for t in text_terms if re.search(r'[\u0600-\u06FF]', t)]
-            all_terms.extend(arabic_terms * 2)
-        
-        if doc_content:
-            texts.append(doc_content)
-            doc_ids.append(doc.id)
+def supports_removal(factory):
+    """Whether indexes built from ``factory`` can drop vectors in place"""
+    return 'HNSW' not in factory or factory.startswith('IVF')
+
+def index_tuning():
+    """Index type and search parameters persisted by ``tune_search_index``"""
+    global _index_tuning, _index_tuning_mtime
+    try:
+        mtime = os.path.getmtime(INDEX_TUNING_FILE)
+    except OSError:
+        return {}
+    if mtime != _index_tuning_mtime:
+        try:
+            with open(INDEX_TUNING_FILE, encoding='utf-8') as f:
+                _index_tuning = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Index tuning read error: {e}")
+            _index_tuning = {}
+        _index_tuning_mtime = mtime
+    return _index_tuning
+
+def save_index_tuning(tuning):
+    """Persist a tuning result for later index builds and searches"""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = f"{INDEX_TUNING_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(tuning, f, indent=2)
+    os.replace(tmp_path, INDEX_TUNING_FILE)
+
+def apply_search_params(target, params=None):
+    """Set nprobe/efSearch style parameters an index understands, ignoring the rest"""
+    if params is None:
+        params = index_tuning().get('params') or DEFAULT_SEARCH_PARAMS
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        try:
+            space.set_index_parameter(target, name, value)
+        except RuntimeError:
+            # Not a parameter of this index type
+            pass
 
-    if not texts:
-        return
+def get_fast_index(training_vectors, n_vectors=None, factory=None):
+    """Create a compact FAISS index for ``n_vectors`` passage vectors.
 
-    # Create embeddings
-    batch_size = 12
+    Uses the factory string chosen by ``tune_search_index`` while the corpus
+    is still near the size it was tuned on, and size-based defaults otherwise.
+    """
+    n_vectors = n_vectors or len(training_vectors)
+    dim = training_vectors.shape[1]
+
+    if factory is None:
+        tuning = index_tuning()
+        tuned_size = tuning.get('n_vectors', 0)
+        tuned_here = tuning.get('model') == EMBEDDING_MODEL_NAME and tuning.get('dim') == dim
+        if (tuned_here and tuned_size / 2 <= n_vectors <= tuned_size * 2
+                and supports_removal(tuning['factory'])):
+            factory = tuning['factory']
+        else:
+            factory = default_index_factory(n_vectors, dim)
+
+    new_index = faiss.index_factory(dim, factory)
+    if not new_index.is_trained:
+        new_index.train(training_vectors)
+    apply_search_params(new_index)
+    return new_index
+
+def document_terms(fields):
+    """Term list of a document for word_frequency, Arabic terms boosted"""
+    fields = document_search_fields(fields)
+    terms = []
+
+    if fields.get('file'):
+        # Filename terms with variants were extracted at save time
+        filename_terms = fields['search_terms'].get('filename', [])
+        terms.extend(filename_terms)
+
+        # Boost Arabic terms
+        arabic_terms = [t for t in filename_terms if re.search(r'[\u0600-\u06FF]', t)]
+        terms.extend(arabic_terms * 3)
+
+    if fields.get('extracted_text'):
+        # Text terms with variants were extracted at save time
+        text_terms = fields['search_terms'].get('text', [])
+        terms.extend(text_terms)
+
+        # Boost Arabic content terms
+        arabic_terms = [t for t in text_terms if re.search(r'[\u0600-\u06FF]', t)]
+        terms.extend(arabic_terms * 2)
+
+    return terms
+
+def document_index_content(fields):
+    """Return the encoder inputs (one per passage) and the term list of a document"""
+    fields = document_search_fields(fields)
+    original_name = get_original_filename(fields['file']) if fields.get('file') else ""
+    passages = split_passages(fields['search_text']) if fields.get('extracted_text') else []
+
+    # The filename gives the first passage its context
+    if passages:
+        passages[0] = f"{original_name} {passages[0]}".strip()
+    elif original_name:
+        passages = [original_name]
+
+    return passages, document_terms(fields)
+
+def document_version(modified_at):
+    """``modified_at`` in whole microseconds, the version of a document the index records"""
+    return calendar.timegm(modified_at.utctimetuple()) * 1000000 + modified_at.microsecond
+
+def record_index_change(doc_id=None, previous=None):
+    """Log a change for every process's index, inside the transaction making it.
+
+    ``previous`` holds the ``INDEXED_FIELDS`` and ``modified_at`` of the
+    version being replaced or deleted, None for new documents. Without a
+    document the change only invalidates cached results.
+    """
+    SearchIndexChange.objects.create(
+        document_id=doc_id,
+        previous_version=document_version(previous['modified_at']) if previous else None,
+        previous_terms=document_terms(previous) if previous else None,
+    )
+
+def encode_local(texts):
+    """Normalized embeddings from this process's encoder"""
+    return get_sbert_model().encode(
+        texts,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        normalize_embeddings=True
+    )
+
+def encode_batch(texts):
+    """Normalized embeddings, from the shared embedding service when it is reachable"""
+    if _encode_batcher is not None:
+        return _encode_batcher.encode(texts)
+    if _embedding_client is not None:
+        try:
+            return _embedding_client.encode(texts)
+        except EmbeddingServiceUnavailable:
+            pass
+    return encode_local(texts)
+
+def serve_embeddings(batcher):
+    """Encode through ``batcher`` instead of the service client (inside the service itself)"""
+    global _embedding_client, _encode_batcher
+    _embedding_client = None
+    _encode_batcher = batcher
+
+def encode_texts(texts, batch_size=12):
+    """Encode texts into normalized embeddings"""
     all_embeddings = []
-    
+    for i in range(0, len(texts), batch_size):
+        all_embeddings.append(encode_batch(texts[i:i + batch_size]))
+    return np.vstack(all_embeddings).astype('float32')
+
+def content_hash(text):
+    """Hash of the exact encoder input"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def embed_passages(documents):
+    """Embeddings for ``[(doc_id, passages)]``, encoding only new or changed passages.
+
+    Vectors are read from and written back to DocumentEmbedding, keyed by
+    document, passage number, model name and a hash of the passage text.
+    Returns ``(vector_ids, vectors)``.
+    """
+    keys = []
+    texts = []
+    for doc_id, passages in documents:
+        for passage_no, text in enumerate(passages):
+            keys.append((doc_id, passage_no))
+            texts.append(text)
+    if not keys:
+        return np.empty(0, dtype='int64'), None
+
+    doc_ids = [doc_id for doc_id, _ in documents]
+    stored = DocumentEmbedding.objects.filter(model_name=EMBEDDING_MODEL_NAME, document_id__in=doc_ids)
+    vectors = {
+        (doc_id, passage_no): (stored_hash, vector)
+        for doc_id, passage_no, stored_hash, vector
+        in stored.values_list('document_id', 'passage', 'content_hash', 'vector').iterator()
+    }
+
+    hashes = [content_hash(text) for text in texts]
+    embeddings = [None] * len(keys)
+    missing = []
+    for i, (key, text_hash) in enumerate(zip(keys, hashes)):
+        stored_hash, vector = vectors.get(key, (None, None))
+        if stored_hash == text_hash:
+            embeddings[i] = np.frombuffer(vector, dtype='float32')
+        else:
+            missing.append(i)
+
+    if missing:
+        encoded = encode_texts([texts[i] for i in missing])
+        rows = []
+        for i, vector in zip(missing, encoded):
+            embeddings[i] = vector
+            rows.append(DocumentEmbedding(
+                document_id=keys[i][0],
+                passage=keys[i][1],
+                model_name=EMBEDDING_MODEL_NAME,
+                content_hash=hashes[i],
+                vector=vector.astype('float32').tobytes()
+            ))
+        DocumentEmbedding.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['document', 'model_name', 'passage'],
+            update_fields=['content_hash', 'vector', 'updated_at']
+        )
+
+    # Drop passages beyond the current passage count of each document
+    by_count = {}
+    for doc_id, passages in documents:
+        by_count.setdefault(len(passages), []).append(doc_id)
+    for count, ids in by_count.items():
+        DocumentEmbedding.objects.filter(
+            model_name=EMBEDDING_MODEL_NAME,
+            document_id__in=ids,
+            passage__gte=count
+        ).delete()
+
+    vector_ids = np.array([passage_id(doc_id, passage_no) for doc_id, passage_no in keys], dtype='int64')
+    return vector_ids, np.vstack(embeddings).astype('float32')
+
+def _build_vector_index(doc_ids, n_vectors):
+    """Assemble the passage index from stored vectors, streaming them in batches"""
+    stored = DocumentEmbedding.objects.filter(model_name=EMBEDDING_MODEL_NAME)
+
+    if n_vectors < 2000:
+        sample = stored.values_list('document_id', 'vector')
+    else:
+        sample = stored.order_by('?').values_list('document_id', 'vector')[:TRAINING_SAMPLE]
+    training = np.vstack([
+        np.frombuffer(vector, dtype='float32') for doc_id, vector in sample if doc_id in doc_ids
+    ])
+
+    new_index = get_fast_index(training, n_vectors)
+
+    batch_ids, batch_vectors = [], []
+    rows = stored.values_list('document_id', 'passage', 'vector').iterator(chunk_size=5000)
+    for doc_id, passage_no, vector in rows:
+        if doc_id not in doc_ids:
+            continue
+        batch_ids.append(passage_id(doc_id, passage_no))
+        batch_vectors.append(np.frombuffer(vector, dtype='float32'))
+        if len(batch_ids) >= 5000:
+            new_index.add_with_ids(np.vstack(batch_vectors), np.array(batch_ids, dtype='int64'))
+            batch_ids, batch_vectors = [], []
+    if batch_ids:
+        new_index.add_with_ids(np.vstack(batch_vectors), np.array(batch_ids, dtype='int64'))
+
+    return new_index
+
+def current_index_state():
+    """The published index state; read it once per operation"""
+    return _index_state
+
+def publish_index_state(state):
+    """Make ``state`` the one readers see and return it as published"""
+    global _index_state, _working_state, _working_updates
+    if state.index is not None:
+        # Not visible to readers yet, so this cannot race a search
+        apply_search_params(state.index)
+    if state.completions is None:
+        # Built here so autocomplete requests never pay for it
+        state = state._replace(completions=build_prefix_index(state.word_frequency))
+    with _writer_lock:
+        # Pending updates were made against the state being replaced
+        _working_state = None
+        _working_updates = 0
+        # A single reference assignment, so readers see the old state or the new one
+        _index_state = state._replace(generation=_index_state.generation + 1)
+        return _index_state
+
+def build_index_state():
+    """Build every search index from the database into a new, unpublished state"""
+    # Read before the documents, so changes committed meanwhile are applied again
+    change_id, change_gaps = _change_watermark()
+    documents = Document.objects.values('id', 'modified_at', *INDEXED_FIELDS, *FILTER_FIELDS)
+    doc_ids = set()
+    all_terms = Counter()
+    lexical = InvertedIndex()
+    attribute_rows = []
+    n_vectors = 0
+    batch = []
+    encoding_error = None
+
+    def flush(batch):
+        # Embeddings are stored as we go; the index is assembled afterwards
+        vector_ids, _ = embed_passages(batch)
+        doc_ids.update(doc_id for doc_id, _ in batch)
+        return len(vector_ids)
+
+    for fields in documents.iterator(chunk_size=INDEX_BATCH_DOCUMENTS):
+        lexical.add_document(fields['id'], *document_lexical_fields(fields))
+
+        passages, terms = document_index_content(fields)
+        all_terms.update(terms)
+        attribute_rows.append((fields['id'], len(passages), document_version(fields['modified_at']), fields))
+
+        if passages and encoding_error is None:
+            batch.append((fields['id'], passages))
+            if len(batch) >= INDEX_BATCH_DOCUMENTS:
+                try:
+                    n_vectors += flush(batch)
+                except Exception as e:
+                    encoding_error = e
+                batch = []
+
+    if batch and encoding_error is None:
+        try:
+            n_vectors += flush(batch)
+        except Exception as e:
+            encoding_error = e
+
+    # The lexical index needs no encoder, so keep it even if encoding fails
+    state = IndexState(
+        lexical_index=lexical,
+        attributes=DocumentAttributes.build(attribute_rows),
+        change_id=change_id,
+        change_gaps=change_gaps,
+    )
+
+    if encoding_error is not None:
+        print(f"Indexing error: {encoding_error}")
+        return state
+    if not n_vectors:
+        return state
+
     try:
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            embeddings = sbert_model.encode(
-                batch, 
-                convert_to_numpy=True, 
-                show_progress_bar=False,
-                normalize_embeddings=True
-            )
-            all_embeddings.append(embeddings)
-        
-        if all_embeddings:
-            embeddings = np.vstack(all_embeddings)
-            
-            # Create fast index
-            index = get_fast_index(embeddings)
-            documents_db = doc_ids
-            index.add(embeddings)
-            
-            # Build term frequency
-            word_frequency = Counter(all_terms)
-            if len(word_frequency) > 3000:
-                word_frequency = Counter(dict(word_frequency.most_common(3000)))
-                
+        # Term frequency is kept complete so single documents can be subtracted
+        return state._replace(
+            index=_build_vector_index(doc_ids, n_vectors),
+            documents_db=frozenset(doc_ids),
+            word_frequency=all_terms,
+        )
     except Exception as e:
         print(f"Indexing error: {e}")
-        index = None
+        return state
 
-def suggest_documents(query, top_n=4):
-    """Document suggestions with comprehensive document data"""
-    global index, documents_db, embedding_cache
-    
-    if index is None or (hasattr(index, 'ntotal') and index.ntotal == 0):
-        index_documents()
-        if index is None or index.ntotal == 0:
+def index_documents():
+    """Enhanced indexing with original filename preservation"""
+    global _last_sync
+    with _writer_lock:
+        _last_sync = time.monotonic()
+        return publish_index_state(build_index_state())
+
+def _copy_index(state):
+    """In-memory copy of a state's FAISS index that can be changed freely"""
+    if not state.read_only:
+        return faiss.clone_index(state.index)
+    try:
+        source = faiss.extract_index_ivf(state.index)
+    except RuntimeError:
+        # Only inverted lists are memory-mapped, so other types serialize fine
+        return faiss.deserialize_index(faiss.serialize_index(state.index))
+
+    # Memory-mapped inverted lists can be neither cloned nor serialized; copy them list by list
+    copy = faiss.deserialize_index(faiss.serialize_index(state.index), faiss.IO_FLAG_SKIP_IVF_DATA)
+    lists = faiss.ArrayInvertedLists(source.nlist, source.code_size)
+    for list_no in range(source.nlist):
+        size = source.invlists.list_size(list_no)
+        if size:
+            lists.add_entries(list_no, size, source.invlists.get_ids(list_no), source.invlists.get_codes(list_no))
+    ivf = faiss.extract_index_ivf(copy)
+    ivf.replace_invlists(lists, True)
+    lists.this.disown()
+    ivf.ntotal = source.ntotal
+    return copy
+
+def _begin_update():
+    """Writer-private copy of the published state for incremental updates"""
+    global _working_state
+    if _working_state is None:
+        state = _index_state
+        _working_state = state._replace(
+            index=_copy_index(state) if state.index is not None else None,
+            documents_db=set(state.documents_db),
+            word_frequency=Counter(state.word_frequency),
+            lexical_index=state.lexical_index.copy() if state.lexical_index is not None else None,
+            attributes=state.attributes.copy() if state.attributes is not None else None,
+            completions=None,
+            read_only=False,
+        )
+    return _working_state
+
+def publish_updates():
+    """Publish incremental updates applied since the last publish, if any"""
+    with _writer_lock:
+        if _working_state is None:
+            return None
+        return publish_index_state(_working_state._replace(
+            documents_db=frozenset(_working_state.documents_db)
+        ))
+
+def _remove_document_vectors(work, doc_id):
+    """Drop a document's passage vectors from the working index"""
+    global _working_state
+    try:
+        work.index.remove_ids(_document_id_range(doc_id))
+    except RuntimeError:
+        # Only an index built from an older HNSW tuning gets here; rebuild it
+        # from stored vectors (with the current factory choice)
+        remaining = work.documents_db - {doc_id}
+        if remaining:
+            _working_state = work._replace(index=_build_vector_index(remaining, work.index.ntotal))
+        else:
+            work.index.reset()
+    return _working_state
+
+def _replaced_terms(doc_id, version):
+    """Term list of a document version, logged by the change that replaced it"""
+    return SearchIndexChange.objects.filter(
+        document_id=doc_id,
+        previous_version=version
+    ).values_list('previous_terms', flat=True).first()
+
+def update_document_index(doc_id, publish=True):
+    """Bring one document's postings, passages, term counts and filters in line with the database.
+
+    The index records the version of every document it holds, so a change
+    it already reflects is skipped, and the term counts of the version it
+    replaces come from the change row logged for that version. With
+    ``publish=False`` the change stays private to the writer until
+    ``publish_updates`` runs. Returns whether the index changed.
+    """
+    global _working_state, _working_updates
+    fields = Document.objects.filter(pk=doc_id).values('modified_at', *INDEXED_FIELDS, *FILTER_FIELDS).first()
+    if fields is None:
+        return remove_document_index(doc_id, publish)
+
+    with _writer_lock:
+        state = _working_state or _index_state
+        if state.lexical_index is None or state.attributes is None:
+            return False
+        version = document_version(fields['modified_at'])
+        held = state.attributes.version(doc_id)
+        if held == version:
+            return False
+        old_terms = _replaced_terms(doc_id, held) if held is not None else None
+
+        work = _begin_update()
+        # Scans every posting list; the terms of the version held are not kept
+        work.lexical_index.remove_document(doc_id)
+        work.lexical_index.add_document(doc_id, *document_lexical_fields(fields))
+
+        # Unchanged passages reuse their stored vectors
+        passages, terms = document_index_content(fields)
+        vector_ids, vectors = embed_passages([(doc_id, passages)])
+
+        if doc_id in work.documents_db:
+            work = _remove_document_vectors(work, doc_id)
+            work.documents_db.discard(doc_id)
+            if old_terms:
+                _subtract_terms(work.word_frequency, old_terms)
+
+        if vectors is not None:
+            if work.index is None:
+                # The first document with text since an empty build
+                work = _working_state = work._replace(index=get_fast_index(vectors))
+            work.index.add_with_ids(vectors, vector_ids)
+            work.documents_db.add(doc_id)
+            work.word_frequency.update(terms)
+        work.attributes.set(doc_id, fields, len(vector_ids), version)
+        _working_updates += 1
+
+        if publish:
+            publish_updates()
+    return True
+
+def remove_document_index(doc_id, publish=True):
+    """Drop a deleted document's postings, passages and term counts from the index"""
+    global _working_updates
+    with _writer_lock:
+        state = _working_state or _index_state
+        in_lexical = state.lexical_index is not None and doc_id in state.lexical_index
+        in_index = state.index is not None and doc_id in state.documents_db
+        in_attributes = state.attributes is not None and doc_id in state.attributes
+        if not (in_lexical or in_index or in_attributes):
+            return False
+        held = state.attributes.version(doc_id) if in_attributes else None
+
+        work = _begin_update()
+        if in_lexical:
+            work.lexical_index.remove_document(doc_id)
+        if in_index:
+            work = _remove_document_vectors(work, doc_id)
+            work.documents_db.discard(doc_id)
+            old_terms = _replaced_terms(doc_id, held) if held is not None else None
+            if old_terms:
+                _subtract_terms(work.word_frequency, old_terms)
+        if in_attributes:
+            work.attributes.remove(doc_id)
+        _working_updates += 1
+
+        if publish:
+            publish_updates()
+    return True
+
+def _subtract_terms(word_frequency, terms):
+    word_frequency.subtract(terms)
+    for term in set(terms):
+        if word_frequency[term] <= 0:
+            del word_frequency[term]
+
+def _change_watermark():
+    """Last committed change id, and the lower ids not visible yet (still committing or rolled back)"""
+    recent = list(SearchIndexChange.objects.order_by('-id').values_list('id', flat=True)[:MAX_CHANGE_GAPS])
+    if not recent:
+        return 0, {}
+    now = time.time()
+    present = set(recent)
+    return recent[0], {change_id: now for change_id in range(recent[-1], recent[0]) if change_id not in present}
+
+def _apply_changes():
+    """Apply a batch of change rows the writer's state has not seen; returns how many were read.
+
+    Ids are assigned when a change is written but become visible when its
+    transaction commits, so lower ids missing from a read are kept as gaps
+    and read again until GAP_TIMEOUT (a rolled-back change never shows up).
+    """
+    global _working_state, _index_state
+    state = _working_state or _index_state
+    now = time.time()
+    gaps = {change_id: seen for change_id, seen in state.change_gaps.items() if now - seen < GAP_TIMEOUT}
+    query = Q(id__gt=state.change_id)
+    if gaps:
+        query |= Q(id__in=list(gaps))
+    rows = list(SearchIndexChange.objects.filter(query).order_by('id').values_list('id', 'document_id')[:SYNC_BATCH])
+
+    change_id = state.change_id
+    for row_id, _ in rows:
+        gaps.pop(row_id, None)
+        if row_id > change_id:
+            if row_id - change_id <= MAX_CHANGE_GAPS:
+                gaps.update((missing, now) for missing in range(change_id + 1, row_id))
+            change_id = row_id
+
+    for doc_id in dict.fromkeys(doc_id for _, doc_id in rows if doc_id is not None):
+        try:
+            update_document_index(doc_id, publish=False)
+        except Exception as e:
+            print(f"Index update error: {e}")
+
+    if _working_state is not None:
+        _working_state = _working_state._replace(change_id=change_id, change_gaps=gaps)
+    else:
+        # No document changed, so the published indexes stay as they are
+        _index_state = _index_state._replace(change_id=change_id, change_gaps=gaps)
+    return len(rows)
+
+def sync_index():
+    """Apply and publish every change committed since this process's index was built or last synced.
+
+    Runs on the index thread. Changes from this process and from every other
+    one (web workers, the OCR worker) arrive the same way, through
+    SearchIndexChange, and invalidate cached results once applied. Returns
+    how many change rows were read.
+    """
+    global _sync_pending, _last_sync
+    # Changes committed from here on queue another catch-up
+    _sync_pending = False
+
+    with _writer_lock:
+        state = _working_state or _index_state
+        if state.lexical_index is None or state.attributes is None:
+            # Nothing loaded yet; the first search loads or builds the index
+            return 0
+        if time.monotonic() - _last_sync > CHANGE_RETENTION:
+            # Rows this process has not seen may have been pruned
+            load_or_build_index()
+            return 0
+
+        total = 0
+        try:
+            while True:
+                read = _apply_changes()
+                total += read
+                if read < SYNC_BATCH:
+                    break
+        except Exception as e:
+            print(f"Index sync error: {e}")
+        _last_sync = time.monotonic()
+        published = publish_updates()
+
+    if total:
+        from .search_cache import bump_search_generation
+        bump_search_generation()
+    if published is not None and _snapshot_due(published):
+        save_index_snapshot(published)
+    return total
+
+def schedule_index_sync():
+    """Queue a catch-up on the index thread unless one is already waiting"""
+    global _sync_pending
+    with _pending_lock:
+        if _sync_pending:
+            return False
+        _sync_pending = True
+    _update_executor.submit(sync_index)
+    return True
+
+def refresh_index():
+    """Catch up with changes made by other processes, at most every SYNC_INTERVAL; never blocks"""
+    global _last_sync_request
+    now = time.monotonic()
+    if now - _last_sync_request < SYNC_INTERVAL:
+        return False
+    _last_sync_request = now
+    return schedule_index_sync()
+
+def wait_for_index_updates():
+    """Block until queued catch-ups (and their snapshot) are done"""
+    _update_executor.submit(lambda: None).result()
+
+def encode_query(processed_query):
+    """Embedding of a normalized query, memoized in embedding_cache"""
+    with _embedding_cache_lock:
+        query_embedding = embedding_cache.get(processed_query)
+        if query_embedding is not None:
+            embedding_cache.move_to_end(processed_query)
+            return query_embedding
+
+    query_embedding = encode_batch([processed_query])
+
+    with _embedding_cache_lock:
+        embedding_cache[processed_query] = query_embedding
+        while len(embedding_cache) > CACHE_SIZE:
+            embedding_cache.popitem(last=False)
+    return query_embedding
+
+def clear_embedding_cache():
+    with _embedding_cache_lock:
+        embedding_cache.clear()
+
+class DocumentFilter(NamedTuple):
+    doc_ids: frozenset  # Documents matching the filters
+    selector: object  # FAISS selector over their passage ids
+    n_vectors: int
+
+# Recent filters per published state; filtered queries tend to repeat
+_filter_cache = OrderedDict()
+_filter_cache_lock = threading.Lock()
+FILTER_CACHE_SIZE = 32
+
+def document_filter(state, filters):
+    """Documents of ``state`` matching ``{field: value}`` filters, as a DocumentFilter"""
+    key = (state.generation, tuple(sorted(filters.items())))
+    with _filter_cache_lock:
+        cached = _filter_cache.get(key)
+        if cached is not None:
+            _filter_cache.move_to_end(key)
+            return cached
+
+    mask = state.attributes.match(filters)
+    vector_ids = state.attributes.passage_ids(mask, PASSAGE_BITS)
+    cached = DocumentFilter(
+        frozenset(state.attributes.ids[mask].tolist()),
+        faiss.IDSelectorBatch(vector_ids) if len(vector_ids) else None,
+        len(vector_ids),
+    )
+
+    with _filter_cache_lock:
+        _filter_cache[key] = cached
+        while len(_filter_cache) > FILTER_CACHE_SIZE:
+            _filter_cache.popitem(last=False)
+    return cached
+
+def _search_parameters(index, selector):
+    """Search parameters limiting ``index`` to ``selector`` at its current settings"""
+    ivf = faiss.try_extract_index_ivf(index)
+    base = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if ivf is not None:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = ivf.nprobe
+    elif hasattr(base, 'hnsw'):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = base.hnsw.efSearch
+    else:
+        params = faiss.SearchParameters()
+    params.sel = selector
+    return params
+
+def semantic_search(query, top_n=4, filters=None):
+    """Rank documents by passage similarity to a query.
+
+    Returns ``(doc_id, score, passage_offset)`` triples, best first, with
+    scores on a 0-100 scale. ``filters`` (``{field: value}`` over
+    ``FILTER_FIELDS``) are applied inside the vector search, so the top
+    results are the best matching documents that pass them.
+    """
+    global _search_params_mtime
+
+    # The embedding service searches its own current index; this worker keeps one for fallback
+    if _embedding_client is not None:
+        try:
+            return _embedding_client.search(query, top_n, filters)
+        except EmbeddingServiceUnavailable:
+            pass
+
+    refresh_index()
+    state = current_index_state()
+    if state.index is None or state.index.ntotal == 0:
+        state = ensure_index()
+        if state.index is None or state.index.ntotal == 0:
+            return []
+    index = state.index
+
+    allowed = None
+    if filters:
+        if state.attributes is None:
+            return []
+        allowed = document_filter(state, filters)
+        if not allowed.n_vectors:
             return []
 
     # Preprocess query
@@ -416,95 +1329,110 @@ def suggest_documents(query, top_n=4):
     if len(processed_query) < 2:
         return []
 
-    # Check cache
-    if processed_query in embedding_cache:
-        query_embedding = embedding_cache[processed_query]
-    else:
-        try:
-            query_embedding = sbert_model.encode(
-                [processed_query], 
-                convert_to_numpy=True, 
-                show_progress_bar=False,
-                normalize_embeddings=True
-            )
-            
-            # Manage cache
-            if len(embedding_cache) >= CACHE_SIZE:
-                embedding_cache = dict(list(embedding_cache.items())[CACHE_SIZE//2:])
-            
-            embedding_cache[processed_query] = query_embedding
-        except:
-            return []
+    try:
+        query_embedding = encode_query(processed_query)
+    except:
+        return []
 
     # Perform search
     try:
-        if hasattr(index, 'nprobe'):
-            index.nprobe = min(6, getattr(index, 'nlist', 6))
-        
-        search_count = min(top_n * 4, index.ntotal)
-        distances, indices = index.search(query_embedding, search_count)
-        
-        candidate_ids = []
-        candidate_dists = []
-        for j, i in enumerate(indices[0]):
-            if i != -1 and i < len(documents_db):
-                candidate_ids.append(documents_db[i])
-                candidate_dists.append(distances[0][j])
-                if len(candidate_ids) >= top_n:
-                    break
-        
-        if not candidate_ids:
-            return []
-        
-        # Fetch documents with relationships
-        documents = Document.objects.filter(id__in=candidate_ids).select_related(
-            'internal_entity',
-            'internal_department',
-            'external_entity',
-            'external_department',
-            'external_department__external_entity',
-            'uploaded_by',
-            'last_modified_by'
-        )
-        
-        # Create mapping for quick access
-        id_to_doc = {doc.id: doc for doc in documents}
+        # Published indexes get the tuned parameters; re-apply when the tuning changes
+        tuning_mtime = _index_tuning_mtime if index_tuning() else None
+        if tuning_mtime != _search_params_mtime:
+            apply_search_params(index)
+            _search_params_mtime = tuning_mtime
         
-        results = []
-        for doc_id, dist in zip(candidate_ids, candidate_dists):
-            if doc_id not in id_to_doc:
-                continue
-                
-            doc = id_to_doc[doc_id]
-            
-            # Calculate similarity score (0-100)
-            # Convert L2 distance to cosine similarity
-            cosine_sim = 1 - (dist ** 2) / 2.0
-            score = max(0, int(cosine_sim * 100))
-            
-            # Get original filename
-            original_name = get_original_filename(doc.file.name) if doc.file else None
-            
-            # Get URL info
-            url_info = get_file_url_info(doc)
-            
-            # Build full document dictionary
-            document_dict = build_document_dict(
-                doc,
-                score=score,
-                name=original_name,
-                direct_media_url=url_info['direct_media_url']
-            )
-            
-            results.append(document_dict)
-        
-        return results
+        # Several passages can come from one document, so look further ahead
+        if allowed is None:
+            search_count = min(top_n * 16, index.ntotal)
+            distances, indices = index.search(query_embedding, search_count)
+        else:
+            search_count = min(top_n * 16, allowed.n_vectors)
+            params = _search_parameters(index, allowed.selector)
+            distances, indices = index.search(query_embedding, search_count, params=params)
     except Exception as e:
-        print(f"Suggest documents error: {e}")
+        print(f"Semantic search error: {e}")
         return []
+        
+    # Aggregate passage similarities per document
+    doc_scores = {}
+    doc_offsets = {}
+    for j, vector_id in enumerate(indices[0]):
+        if vector_id == -1:
+            continue
+        doc_id = passage_document(vector_id)
+        # FAISS returns squared L2; for unit vectors cosine = 1 - d²/2
+        cosine_sim = 1 - float(distances[0][j]) / 2.0
+        if doc_id not in doc_scores:
+            doc_scores[doc_id] = cosine_sim
+            doc_offsets[doc_id] = passage_offset(vector_id)
+        elif PASSAGE_AGGREGATION == 'sum':
+            doc_scores[doc_id] += max(0.0, cosine_sim)
+    
+    ranked = sorted(doc_scores, key=doc_scores.get, reverse=True)[:top_n]
+    return [
+        (doc_id, min(100, max(0, int(doc_scores[doc_id] * 100))), doc_offsets[doc_id])
+        for doc_id in ranked
+    ]
 
-def search_documents(query):
-    """High-accuracy search with comprehensive document data"""
+def hydrate_documents(doc_ids):
+    """Load documents with their relationships in one query, keyed by id"""
+    if not doc_ids:
+        return {}
+    documents = Document.objects.select_related(
+        'internal_entity',
+        'internal_department',
+        'external_entity',
+        'external_department',
+        'external_department__external_entity',
+        'uploaded_by',
+        'last_modified_by'
+    ).filter(id__in=list(doc_ids))
+    return {doc.id: doc for doc in documents}
+
+def _document_result(doc, score, **extra):
+    """Response dict for a hydrated document"""
+    url_info = get_file_url_info(doc)
+    document_dict = build_document_dict(
+        doc,
+        score=score,
+        name=get_original_filename(doc.file.name) if doc.file else None,
+        direct_media_url=url_info['direct_media_url']
+    )
+    document_dict.update(extra)
+    return document_dict
+
+def suggest_documents(query, top_n=4, filters=None):
+    """Document suggestions with comprehensive document data"""
+    ranked = semantic_search(query, top_n, filters)
+    id_to_doc = hydrate_documents(doc_id for doc_id, _, _ in ranked)
+
+    results = []
+    for doc_id, score, offset in ranked:
+        if doc_id not in id_to_doc:
+            continue
+        # passage_offset: where the best matching passage starts in the normalized text
+        results.append(_document_result(id_to_doc[doc_id], score, passage_offset=offset))
+    return results
+
+# Points per matching query term for non-filename fields
+LEXICAL_FIELD_POINTS = {'title': 10, 'notes': 5, 'document_number': 30}
+
+# Similarity bucket edges and the points each bucket is worth (below 50 scores nothing)
+SIMILARITY_BUCKETS = np.array([50, 60, 70, 80, 90])
+SIMILARITY_BUCKET_POINTS = np.array([0, 10, 15, 20, 30, 40])
+
+def similarity_points(similarity):
+    """Map an array of term similarities (0-100) to score points"""
+    return SIMILARITY_BUCKET_POINTS[np.digitize(similarity, SIMILARITY_BUCKETS)]
+
+def lexical_search(query, filters=None):
+    """Rank documents for a query through the inverted index.
+
+    Returns ``(doc_id, score)`` pairs, best first, limited to documents
+    matching ``filters`` if given. Cost grows with the matching posting
+    lists and the filename vocabulary, not the table size.
+    """
     if not query or len(query.strip()) < 2:
         return []
     
@@ -528,106 +1456,178 @@ def search_documents(query):
         if len(parts) == 2 and len(parts[1]) <= 4:
             file_extension = parts[1]
             query_terms = enhanced_extract_search_terms(parts[0], 8)
-    
-    # Optimized database query with select_related
-    documents = Document.objects.select_related(
-        'internal_entity',
-        'internal_department',
-        'external_entity',
-        'external_department',
-        'external_department__external_entity',
-        'uploaded_by',
-        'last_modified_by'
-    ).all()[:1500 if has_arabic else 800]
-    
-    scored_results = []
-    seen_ids = set()
-    
-    for doc in documents:
-        if len(scored_results) >= (25 if has_arabic else 15):
-            break
-            
-        if not doc.file or doc.id in seen_ids:
+
+    refresh_index()
+    state = current_index_state()
+    if state.lexical_index is None:
+        state = ensure_index()
+    lexical = state.lexical_index
+    if lexical is None:
+        return []
+
+    allowed = None
+    if filters:
+        if state.attributes is None:
+            return []
+        allowed = document_filter(state, filters).doc_ids
+
+    scores = Counter()
+
+    # 1. Fuzzy term matching against the filename vocabulary, scored as one matrix
+    filename_vocabulary = list(lexical.vocabulary('filename'))
+    if filename_vocabulary:
+        # Every vocabulary term is scored: a partial_ratio prefilter would drop
+        # pairs whose spelling variants still reach a similarity of 50
+        similarity = batch_similarity_scores(query_terms, filename_vocabulary)
+        columns = np.flatnonzero((similarity >= 50).any(axis=0))
+        candidates = [filename_vocabulary[i] for i in columns]
+        points = similarity_points(similarity[:, columns])
+
+        # Best match per query term and document, summed over query terms
+        postings = [lexical.get('filename', term) for term in candidates]
+        term_index = np.repeat(np.arange(len(candidates)), [len(docs) for docs in postings])
+        if len(term_index):
+            doc_ids = np.fromiter((doc_id for docs in postings for doc_id in docs), dtype=np.int64, count=len(term_index))
+            unique_ids, positions = np.unique(doc_ids, return_inverse=True)
+            best = np.zeros((len(query_terms), len(unique_ids)), dtype=np.int64)
+            for row in range(len(query_terms)):
+                np.maximum.at(best[row], positions, points[row, term_index])
+            for doc_id, total in zip(unique_ids.tolist(), best.sum(axis=0).tolist()):
+                if total:
+                    scores[doc_id] += total
+
+    # 2. Content and metadata term matching (whole query tokens catch codes like "d17")
+    query_tokens = LEXICAL_TERM_PATTERN.findall(processed_query)
+    for term in dict.fromkeys(query_terms + query_tokens):
+        forms = canonical_terms(term)
+        text_points = 8 if re.search(r'[\u0600-\u06FF]', term) else 5
+
+        for field, points in [('text', text_points)] + list(LEXICAL_FIELD_POINTS.items()):
+            matched = set()
+            for form in forms:
+                matched.update(lexical.get(field, form))
+            for doc_id in matched:
+                scores[doc_id] += points
+
+    # 3. Whole query present in the content
+    phrase_tokens = [canonical_terms(t)[-1] for t in query_tokens]
+    if phrase_tokens:
+        phrase_docs = set(lexical.get('text', phrase_tokens[0]))
+        for token in phrase_tokens[1:]:
+            phrase_docs &= lexical.get('text', token).keys()
+        for doc_id in phrase_docs:
+            scores[doc_id] += 40
+
+    # 4. Filename bonuses and filtering
+    raw_lower = raw_query.lower()
+    min_score = 20 if has_arabic else 25
+    ranked = []
+
+    for doc_id, score in scores.items():
+        if allowed is not None and doc_id not in allowed:
             continue
-            
-        # Get filename and URL info
-        original_name = get_original_filename(doc.file.name)
-        stored_filename = os.path.basename(doc.file.name)
-        url_info = get_file_url_info(doc)
-        
+        original_name, extension, filename_normalized = lexical.documents.get(doc_id, (None, '', ''))
+        if original_name is None:
+            continue
+
         # Extension filtering
-        if file_extension and not stored_filename.lower().endswith(f'.{file_extension}'):
+        if file_extension and extension != file_extension:
             continue
-        
-        # Prepare for matching
-        filename_normalized = advanced_normalize_text(original_name)
-        filename_terms = enhanced_extract_search_terms(filename_normalized, 25)
-        
-        # Scoring
-        score = 0
-        
-        # 1. Exact match bonus
-        if raw_query.lower() == original_name.lower():
+
+        if raw_lower == original_name.lower():
             score += 1000
-        # 2. Raw query in filename
-        elif raw_query.lower() in original_name.lower():
+        elif raw_lower in original_name.lower():
             score += 200
-        # 3. Normalized exact match
         elif processed_query == filename_normalized:
             score += 150
-        # 4. Phrase matching
         if ('_' in raw_query or '-' in raw_query) and raw_query in original_name:
             score += 100
-        
-        # 5. Term-based matching
-        for query_term in query_terms:
-            best_match_score = max(
-                (arabic_similarity_score(query_term, filename_term) 
-                 for filename_term in filename_terms),
-                default=0
-            )
-            if best_match_score >= 90:
-                score += 40
-            elif best_match_score >= 80:
-                score += 30
-            elif best_match_score >= 70:
-                score += 20
-            elif best_match_score >= 60:
-                score += 15
-            elif best_match_score >= 50:
-                score += 10
-        
-        # 6. Content matching
-        if doc.extracted_text:
-            content_sample = doc.extracted_text[:1500]
-            normalized_content = advanced_normalize_text(content_sample)
-            
-            if raw_query in content_sample:
-                score += 50
-            elif processed_query in normalized_content:
-                score += 40
-            
-            for term in query_terms:
-                if term in normalized_content:
-                    score += 8 if re.search(r'[\u0600-\u06FF]', term) else 5
-        
-        # Threshold filtering
-        min_score = 20 if has_arabic else 25
+
         if score >= min_score:
-            # Build full document dictionary
-            document_dict = build_document_dict(
-                doc,
-                score=score,
-                name=original_name,
-                direct_media_url=url_info['direct_media_url']
-            )
-            
-            scored_results.append(document_dict)
-            seen_ids.add(doc.id)
-    
-    # Sort and limit results
-    scored_results.sort(key=lambda x: x["score"], reverse=True)
-    return scored_results[:20 if has_arabic else 12]
+            ranked.append((doc_id, score))
+
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked[:20 if has_arabic else 12]
+
+def search_documents(query, filters=None):
+    """High-accuracy search with comprehensive document data"""
+    ranked = lexical_search(query, filters)
+    id_to_doc = hydrate_documents(doc_id for doc_id, _ in ranked)
+
+    results = []
+    for doc_id, score in ranked:
+        doc = id_to_doc.get(doc_id)
+        if doc is None or not doc.file:
+            continue
+        results.append(_document_result(doc, score))
+    return results
+
+# Reciprocal rank fusion: score = sum(weight / (RRF_K + rank)) over the ranked lists
+RRF_K = getattr(settings, 'SEARCH_RRF_K', 60)
+LEXICAL_WEIGHT = getattr(settings, 'SEARCH_LEXICAL_WEIGHT', 1.0)
+SEMANTIC_WEIGHT = getattr(settings, 'SEARCH_SEMANTIC_WEIGHT', 1.0)
+
+# Semantic candidates gathered for fusion, on top of the suggestions shown
+SEMANTIC_CANDIDATES = 20
+
+# Similarity (0-100) a semantic hit needs to be fused in without any lexical match
+SEMANTIC_MIN_SCORE = getattr(settings, 'SEARCH_SEMANTIC_MIN_SCORE', 40)
+
+def fuse_rankings(rankings, k=RRF_K):
+    """Reciprocal rank fusion of ``[(weight, [doc_id, ...])]``, best first"""
+    fused = {}
+    for weight, doc_ids in rankings:
+        for rank, doc_id in enumerate(doc_ids, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+def hybrid_search(query, top_k=20, top_n=4, filters=None):
+    """Fused lexical and semantic results plus semantic suggestions.
+
+    Both candidate lists are gathered as ids, fused with reciprocal rank
+    fusion and hydrated with a single query; the query is encoded once.
+    A result's ``score`` is its fusion score; ``lexical_score`` (points) and
+    ``semantic_score`` (0-100) are ``None`` where that ranking missed it.
+    Returns ``(results, suggestions)``.
+    """
+    lexical = lexical_search(query, filters)
+    semantic = semantic_search(query, max(top_n, SEMANTIC_CANDIDATES), filters)
+
+    lexical_scores = dict(lexical)
+    semantic_hits = {doc_id: (score, offset) for doc_id, score, offset in semantic}
+
+    # Nearest neighbours exist for any query, so unmatched ones must be similar enough
+    semantic_ranking = [
+        doc_id for doc_id, score, _ in semantic
+        if score >= SEMANTIC_MIN_SCORE or doc_id in lexical_scores
+    ]
+    fused = fuse_rankings([
+        (LEXICAL_WEIGHT, [doc_id for doc_id, _ in lexical]),
+        (SEMANTIC_WEIGHT, semantic_ranking),
+    ])[:top_k]
+    suggested = [doc_id for doc_id, _, _ in semantic[:top_n]]
+
+    id_to_doc = hydrate_documents({doc_id for doc_id, _ in fused} | set(suggested))
+
+    results = []
+    for doc_id, fusion_score in fused:
+        doc = id_to_doc.get(doc_id)
+        if doc is None or not doc.file:
+            continue
+        extra = {'lexical_score': lexical_scores.get(doc_id), 'semantic_score': None}
+        if doc_id in semantic_hits:
+            extra['semantic_score'], extra['passage_offset'] = semantic_hits[doc_id]
+        results.append(_document_result(doc, round(fusion_score, 6), **extra))
+
+    suggestions = []
+    for doc_id in suggested:
+        doc = id_to_doc.get(doc_id)
+        if doc is None:
+            continue
+        score, offset = semantic_hits[doc_id]
+        suggestions.append(_document_result(doc, score, passage_offset=offset))
+
+    return results, suggestions
 
 def get_word_suggestions(query, limit=8):
     """Arabic-aware word suggestions"""
@@ -639,6 +1639,7 @@ def get_word_suggestions(query, limit=8):
         return []
     
     suggestions = []
+    word_frequency = current_index_state().word_frequency
     
     if word_frequency:
         has_arabic = bool(re.search(r'[\u0600-\u06FF]', processed_query))
@@ -647,7 +1648,7 @@ def get_word_suggestions(query, limit=8):
         # Get initial matches
         matches = process.extract(
             processed_query, 
-            word_frequency.keys(), 
+            [w for w, _ in word_frequency.most_common(3000)], 
             limit=candidate_limit,
             scorer=fuzz.ratio
         )
@@ -656,7 +1657,7 @@ def get_word_suggestions(query, limit=8):
         arabic_suggestions = []
         other_suggestions = []
         
-        for word, score in matches:
+        for word, score, _ in matches:
             if score < 30:
                 continue
                 
@@ -678,11 +1679,265 @@ def get_word_suggestions(query, limit=8):
     
     return suggestions[:limit]
 
-# Initialize index on startup
-def ensure_index():
-    global index
-    if index is None or (hasattr(index, 'ntotal') and index.ntotal == 0):
-        index_documents()
+def fold_prefix(text):
+    """Canonical form of typed text for prefix lookups"""
+    return advanced_normalize_text(text).replace('_', ' ')
+
+def build_prefix_index(word_frequency):
+    """Completion index over the terms of a word_frequency Counter"""
+    weights = Counter()
+    for term, count in word_frequency.items():
+        # Variants stored for matching fold back onto their canonical term
+        term = fold_prefix(term)
+        if len(term) >= 2 and not term.isdigit():
+            weights[term] += count
+
+    entries = []
+    for term, weight in weights.items():
+        # Reachable with and without the Arabic article
+        for key in canonical_terms(term):
+            entries.append((key, term, weight))
+    return PrefixIndex(entries)
+
+def autocomplete(query, limit=8):
+    """Most frequent indexed terms starting with ``query``, as ``(term, weight)`` pairs"""
+    prefix = fold_prefix(query or '')
+    if not prefix:
+        return []
+
+    refresh_index()
+    state = current_index_state()
+    if not state.word_frequency:
+        state = ensure_index()
+    completions = state.completions
+    if completions is None:
+        return []
+
+    results = completions.complete(prefix, limit)
+    if ' ' in prefix and len(results) < limit:
+        # Complete the last word of a multi-word query
+        head, last = prefix.rsplit(' ', 1)
+        seen = {term for term, _ in results}
+        for term, weight in completions.complete(last, limit):
+            phrase = f"{head} {term}"
+            if phrase not in seen:
+                results.append((phrase, weight))
+                if len(results) >= limit:
+                    break
+    return results
+
+def _current_snapshot_dir():
+    """Return the directory of the published snapshot, if any"""
+    try:
+        with open(os.path.join(INDEX_DIR, 'CURRENT'), encoding='utf-8') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(INDEX_DIR, name)
+    return path if name and os.path.isdir(path) else None
+
+def _snapshot_due(state):
+    """Whether ``state`` has changes the published snapshot lacks and that one is old enough to replace"""
+    snapshot_dir = _current_snapshot_dir()
+    if snapshot_dir is None:
+        return True
+    try:
+        published = int(os.path.basename(snapshot_dir).split('-')[1])
+        age = time.time() - os.path.getmtime(os.path.join(INDEX_DIR, 'CURRENT'))
+    except (IndexError, ValueError, OSError):
+        return True
+    return state.change_id > published and age >= SNAPSHOT_INTERVAL
+
+def save_index_snapshot(state=None):
+    """Write index, id map and term frequencies as a new versioned snapshot.
+
+    A snapshot records the last change it contains, so a process loading
+    it applies every later change from the log; whichever process writes
+    last, nothing is lost. Change rows older than CHANGE_RETENTION and
+    already contained in the snapshot are pruned.
+    """
+    global _loaded_snapshot
+
+    state = state or current_index_state()
+    if state.index is None and state.lexical_index is None:
+        return False
+
+    # Every save gets its own name, so loaders never mix two saves
+    publish_id = uuid.uuid4().hex
+    name = f"v{INDEX_FORMAT_VERSION}-{state.change_id}-{publish_id}"
+    target = os.path.join(INDEX_DIR, name)
+    tmp_dir = f"{target}.tmp{os.getpid()}"
+
+    with _writer_lock:
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            if state.index is not None:
+                faiss.write_index(state.index, os.path.join(tmp_dir, 'index.faiss'))
+            if state.lexical_index is not None:
+                state.lexical_index.save(os.path.join(tmp_dir, 'lexical.pkl'))
+            if state.attributes is not None:
+                state.attributes.save(os.path.join(tmp_dir, 'attributes.pkl'))
+            if state.completions is not None:
+                state.completions.save(os.path.join(tmp_dir, 'prefix.pkl'))
+            meta = {
+                'version': INDEX_FORMAT_VERSION,
+                'normalization': NORMALIZATION_VERSION,
+                'model': EMBEDDING_MODEL_NAME,
+                'publish_id': publish_id,
+                'change_id': state.change_id,
+                'change_gaps': state.change_gaps,
+                'documents_db': sorted(state.documents_db),
+                'word_frequency': dict(state.word_frequency),
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            os.replace(tmp_dir, target)
+
+            # Publish atomically by swapping the CURRENT pointer
+            pointer_tmp = os.path.join(INDEX_DIR, f"CURRENT.tmp{os.getpid()}")
+            with open(pointer_tmp, 'w', encoding='utf-8') as f:
+                f.write(name)
+            os.replace(pointer_tmp, os.path.join(INDEX_DIR, 'CURRENT'))
+
+            _loaded_snapshot = name
+
+            # Drop older snapshots
+            for entry in os.listdir(INDEX_DIR):
+                if entry.startswith('v') and entry != name and '.tmp' not in entry:
+                    shutil.rmtree(os.path.join(INDEX_DIR, entry), ignore_errors=True)
+        except Exception as e:
+            print(f"Index snapshot save error: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+    try:
+        SearchIndexChange.objects.filter(
+            id__lte=state.change_id,
+            created_at__lt=timezone.now() - timedelta(seconds=CHANGE_RETENTION)
+        ).delete()
+    except Exception as e:
+        print(f"Index change log prune error: {e}")
+    return True
+
+def _read_faiss_index(path):
+    """Read a FAISS index, memory-mapping it when the index type allows"""
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception:
+        return faiss.read_index(path)
+
+def load_index_snapshot():
+    """Load and publish the on-disk snapshot if it was written by a compatible build.
+
+    The snapshot may predate changes other processes made since; a
+    ``sync_index`` afterwards applies them.
+    """
+    global _loaded_snapshot, _last_sync
+
+    snapshot_dir = _current_snapshot_dir()
+    if snapshot_dir is None:
+        return False
+
+    try:
+        with open(os.path.join(snapshot_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if (meta.get('version') != INDEX_FORMAT_VERSION
+                or meta.get('normalization') != NORMALIZATION_VERSION
+                or meta.get('model') != EMBEDDING_MODEL_NAME):
+            return False
+
+        index_path = os.path.join(snapshot_dir, 'index.faiss')
+        loaded_index = _read_faiss_index(index_path) if os.path.exists(index_path) else None
+
+        lexical_path = os.path.join(snapshot_dir, 'lexical.pkl')
+        loaded_lexical = InvertedIndex.load(lexical_path) if os.path.exists(lexical_path) else None
+
+        attributes_path = os.path.join(snapshot_dir, 'attributes.pkl')
+        loaded_attributes = DocumentAttributes.load(attributes_path) if os.path.exists(attributes_path) else None
+
+        # Older snapshots have none; it is then built while publishing
+        prefix_path = os.path.join(snapshot_dir, 'prefix.pkl')
+        loaded_completions = PrefixIndex.load(prefix_path) if os.path.exists(prefix_path) else None
+    except Exception as e:
+        print(f"Index snapshot load error: {e}")
+        return False
+
+    with _writer_lock:
+        publish_index_state(IndexState(
+            index=loaded_index,
+            documents_db=frozenset(meta['documents_db']),
+            word_frequency=Counter(meta['word_frequency']),
+            lexical_index=loaded_lexical,
+            attributes=loaded_attributes,
+            completions=loaded_completions,
+            read_only=loaded_index is not None,
+            change_id=meta['change_id'],
+            change_gaps={int(change_id): seen for change_id, seen in meta['change_gaps'].items()},
+        ))
+        _loaded_snapshot = os.path.basename(snapshot_dir)
+        _last_sync = time.monotonic()
+    return True
+
+def load_or_build_index():
+    """Publish the snapshot caught up with the change log, or build and snapshot a new index"""
+    global _last_rebuild
+
+    with _writer_lock:
+        start = time.perf_counter()
+        if load_index_snapshot():
+            record_load("load index snapshot", time.perf_counter() - start)
+            sync_index()
+        else:
+            _last_rebuild = time.monotonic()
+            index_documents()
+            sync_index()
+            save_index_snapshot()
+            record_load("build search index", time.perf_counter() - start)
+
+    from .search_cache import bump_search_generation
+    bump_search_generation()
+    return current_index_state()
+
+def _index_ready(state):
+    return state.lexical_index is not None and state.index is not None and state.index.ntotal > 0
+
+def ensure_index(wait=False):
+    """Return the published state, first loading or building the index if it is empty.
+
+    A compatible snapshot is loaded right away unless a writer is busy; a
+    rebuild runs on the index thread and is published when done, so request
+    threads get the current (possibly empty) state instead of waiting.
+    ``wait=True`` blocks until the build finishes.
+    """
+    global _rebuild_future
+
+    state = current_index_state()
+    if _index_ready(state):
+        return state
+
+    # Nothing published yet: a snapshot is quick to load, a build is not
+    if state.generation == 0 and _writer_lock.acquire(blocking=False):
+        try:
+            start = time.perf_counter()
+            if current_index_state().generation == 0 and load_index_snapshot():
+                record_load("load index snapshot", time.perf_counter() - start)
+                # Changes made since the snapshot are applied off the request thread
+                schedule_index_sync()
+                return current_index_state()
+        except Exception as e:
+            print(f"Index snapshot error: {e}")
+        finally:
+            _writer_lock.release()
+
+    with _pending_lock:
+        future = _rebuild_future
+        if future is None or future.done():
+            # An empty database leaves the index empty; do not rebuild on every query
+            if future is not None and time.monotonic() - _last_rebuild < REBUILD_RETRY_INTERVAL:
+                return current_index_state()
+            future = _rebuild_future = _update_executor.submit(load_or_build_index)
 
-# Initial indexing
-ensure_index()
\ No newline at end of file
+    if wait:
+        return future.result()
+    return current_index_state()
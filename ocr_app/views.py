@@ -1,12 +1,17 @@
 import os
 from django.conf import settings
 from django.core.files.storage import default_storage
-from .utils_ocr import extract_text_from_image, extract_text_from_pdf, extract_text_from_word
-from .utils_search import search_documents, suggest_documents
+from .ocr_cache import extract_text_cached
+from .upload_handlers import file_sha256
+from .utils_search import autocomplete, hybrid_search
+from .prefix_index import MAX_COMPLETIONS
+from .document_attributes import parse_filters
+from .search_cache import cached_search, search_cache_stats
 from archievesystem.models import Document
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework import status
 
 class UploadDocumentService:
@@ -14,22 +19,32 @@ class UploadDocumentService:
         self.file = file
         self.user = user
 
+    def content_hash(self):
+        """SHA-256 of the upload, normally computed while it was received"""
+        if not getattr(self.file, 'sha256', None):
+            self.file.sha256 = file_sha256(self.file)
+        return self.file.sha256
+
+    def store(self):
+        """Save the file to storage directly (without any subdirectory)"""
+        if getattr(settings, 'OCR_DEDUPLICATE_FILES', False):
+            # Identical content is already stored; point at that copy
+            existing = Document.objects.filter(
+                content_hash=self.content_hash()
+            ).exclude(file='').values_list('file', flat=True).first()
+            if existing:
+                return existing
+        return default_storage.save(self.file.name, self.file)
+
     def upload(self):
-        f = self.file
-        
-        # Save the file to storage directly (without any subdirectory)
-        file_name = default_storage.save(f.name, f)
+        """Store the file and extract its text on the calling thread"""
+        file_name = self.store()
         
         # Get the absolute path for OCR processing
         file_path = default_storage.path(file_name)
         
-        # Perform OCR based on file type
-        if f.name.lower().endswith('.pdf'):
-            extracted_text = extract_text_from_pdf(file_path)
-        elif f.name.lower().endswith(('.doc', '.docx')):
-            extracted_text = extract_text_from_word(file_path)
-        else:  # For images
-            extracted_text = extract_text_from_image(file_path)
+        # Perform OCR based on file type, unless this content was extracted before
+        extracted_text = extract_text_cached(self.content_hash(), self.file.name, file_path)
 
         return file_name, extracted_text
 
@@ -78,8 +93,13 @@ class SearchDocumentView(APIView):
         if not query:
             return Response({"error": "Query parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        results = search_documents(query)
-        suggestions = suggest_documents(query)
+        # Same filter parameters as the documents endpoint, applied inside the search
+        filters = parse_filters(request.GET)
+
+        # One encode and one document query for both lists
+        results, suggestions = cached_search(
+            'hybrid', query, lambda: hybrid_search(query, filters=filters), filters
+        )
 
         # Convert relative URLs to absolute URLs
         base_url = request.build_absolute_uri('/')[:-1]  # Get base URL without trailing slash
@@ -111,4 +131,31 @@ class SearchDocumentView(APIView):
             "query": query,
             "results": results,
             "suggestions": suggestions
-        })
\ No newline at end of file
+        })
+
+
+class AutocompleteView(APIView):
+    def get(self, request):
+        query = request.GET.get("query", "")
+        if not query:
+            return Response({"error": "Query parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.GET.get("limit", 8)), 1), MAX_COMPLETIONS)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "query": query,
+            "suggestions": [
+                {"term": term, "weight": weight}
+                for term, weight in autocomplete(query, limit)
+            ]
+        })
+
+
+class SearchCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(search_cache_stats())
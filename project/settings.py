@@ -46,6 +46,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Trigram lookups of the Postgres search backend
+    'django.contrib.postgres',
 
     # 3rd party
     'rest_framework',
@@ -142,6 +144,70 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Search index snapshots, which only speed up process start. Processes that do not
+# share this directory (e.g. separate containers) still stay current: every process
+# applies the search change log kept in the database
+SEARCH_INDEX_DIR = Path(os.environ.get("SEARCH_INDEX_DIR", BASE_DIR / 'search_index'))
+
+# "postgres" uses full-text + trigram indexes (PostgreSQL only), "python" the in-process index
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "python")
+
+# Sentence encoder runtime: "torch" (fp32), "int8" (dynamic quantization) or "onnx"
+SEARCH_ENCODER_BACKEND = os.environ.get("SEARCH_ENCODER_BACKEND", "torch")
+
+# Unix socket of a shared run_embedding_service process holding the one encoder; unset
+# encodes in each worker. Workers load their own search index either way.
+SEARCH_EMBEDDING_SOCKET = os.environ.get("SEARCH_EMBEDDING_SOCKET") or None
+
+# Search result cache: per-process memory by default, bounded by entries and bytes,
+# or a directory shared across workers, bounded by SEARCH_CACHE_MAX_ENTRIES only.
+# Either way a process drops its cached results once it applies a logged change
+SEARCH_CACHE_DIR = os.environ.get("SEARCH_CACHE_DIR")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if SEARCH_CACHE_DIR
+            else 'ocr_app.cache_backends.SizeBoundedLocMemCache'
+        ),
+        'LOCATION': SEARCH_CACHE_DIR or 'search-results',
+        'TIMEOUT': int(os.environ.get("SEARCH_CACHE_TTL", 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 1000)),
+        },
+    },
+}
+if not SEARCH_CACHE_DIR:
+    CACHES['search']['OPTIONS']['MAX_BYTES'] = int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Uploads return before OCR; a run_ocr_worker process (the Procfile "worker") extracts
+# the text. "False" extracts during the request when no worker is deployed
+OCR_ASYNC = os.environ.get("OCR_ASYNC", "True") == "True"
+OCR_WORKER_CONCURRENCY = int(os.environ.get("OCR_WORKER_CONCURRENCY", 2))
+OCR_JOB_MAX_ATTEMPTS = int(os.environ.get("OCR_JOB_MAX_ATTEMPTS", 3))
+
+# Scanned PDF pages are rendered at OCR_PDF_DPI and OCRed across OCR_PDF_PROCESSES processes
+OCR_PDF_DPI = int(os.environ.get("OCR_PDF_DPI", 300))
+OCR_PDF_PROCESSES = int(os.environ.get("OCR_PDF_PROCESSES", min(4, os.cpu_count() or 1)))
+
+# "tesserocr" (Tesseract kept loaded via its C API), "pytesseract" (binary per image) or "auto"
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "auto")
+
+# Image buffers one OCR'd image or page may hold; a full-resolution pass runs only below OCR_MIN_CONFIDENCE
+OCR_MEMORY_LIMIT = int(os.environ.get("OCR_MEMORY_LIMIT_MB", 256)) * 1024 * 1024
+OCR_MIN_CONFIDENCE = float(os.environ.get("OCR_MIN_CONFIDENCE", 70))
+
+# Uploads are hashed as they arrive to find duplicates and cached OCR text
+FILE_UPLOAD_HANDLERS = [
+    'ocr_app.upload_handlers.HashingMemoryFileUploadHandler',
+    'ocr_app.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+# Point re-uploads of identical content at the already stored file instead of storing a copy
+OCR_DEDUPLICATE_FILES = os.environ.get("OCR_DEDUPLICATE_FILES", "False") == "True"
+
 # ✅ Cloudinary إعدادات
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 